@@ -0,0 +1,310 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from datos_ventas import (PANES, DIAS, RUTA_VENTAS, COLUMNAS_CATEGORIAS, TIPO_CANTIDAD,
+                          numero_dia_semana, leer_ventas_por_bloques, cargar_ventas)
+
+# Historial de ventas en columnas binarias, particionado por año. Cada
+# partición (datos/ventas/<año>/) tiene un archivo por columna al que solo se
+# añaden filas al final; para leer, cada archivo se mapea en memoria.
+CARPETA_ALMACEN = "datos/ventas"
+ESQUEMA = "esquema.json"
+
+# Día y clima se guardan como códigos de un byte; los textos van en el esquema
+TIPO_CODIGO = np.uint8
+TIPO_FECHA = np.dtype("<M8[D]")
+
+
+def _tipo_columna(columna):
+    if columna == "Fecha":
+        return TIPO_FECHA
+    if columna in COLUMNAS_CATEGORIAS:
+        return np.dtype(TIPO_CODIGO)
+    return np.dtype(TIPO_CANTIDAD)
+
+
+class AlmacenVentas:
+    """
+    Almacén columnar de solo añadir con las columnas de pankira.csv: Fecha,
+    Dia_De_La_Semana, los panes y Clima. Se leen solo las columnas y los años
+    que se piden, sin convertir texto.
+    """
+
+    def __init__(self, carpeta=CARPETA_ALMACEN):
+        self.carpeta = carpeta
+        self.columnas = ["Fecha", "Dia_De_La_Semana"] + PANES + ["Clima"]
+        ruta = os.path.join(carpeta, ESQUEMA)
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                esquema = json.load(f)
+            self.climas = esquema["climas"]
+        else:
+            self.climas = []
+        self.codigo_clima = {clima: i for i, clima in enumerate(self.climas)}
+
+    def existe(self):
+        """Indica si el almacén ya tiene un esquema (es decir, si se le añadió algo)."""
+        return os.path.exists(os.path.join(self.carpeta, ESQUEMA))
+
+    def particiones(self):
+        """Años con datos, en orden."""
+        if not os.path.isdir(self.carpeta):
+            return []
+        return sorted(int(nombre) for nombre in os.listdir(self.carpeta) if nombre.isdigit())
+
+    def _ruta(self, anio, columna):
+        return os.path.join(self.carpeta, str(anio), f"{columna}.bin")
+
+    def _filas(self, anio):
+        """
+        Filas completas de una partición: si una escritura se interrumpió, alguna
+        columna puede ser más larga que las demás y esas filas se ignoran.
+        """
+        filas = []
+        for columna in self.columnas:
+            ruta = self._ruta(anio, columna)
+            filas.append(os.path.getsize(ruta) // _tipo_columna(columna).itemsize if os.path.exists(ruta) else 0)
+        return min(filas)
+
+    def __len__(self):
+        return sum(self._filas(anio) for anio in self.particiones())
+
+    def _guardar_esquema(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        ruta = os.path.join(self.carpeta, ESQUEMA)
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"columnas": self.columnas, "dias": DIAS, "climas": self.climas}, f, ensure_ascii=False, indent=2)
+        os.replace(ruta + ".tmp", ruta)
+
+    def _codigos_clima(self, climas):
+        """
+        Códigos de una columna de climas y lista de climas nuevos (reciben los
+        códigos siguientes). No se toca el esquema: lo guarda agregar cuando
+        todas las comprobaciones han pasado.
+        """
+        nuevos = [clima for clima in pd.unique(np.asarray(climas, dtype=object))
+                  if not pd.isna(clima) and clima not in self.codigo_clima]
+        if len(self.climas) + len(nuevos) > np.iinfo(TIPO_CODIGO).max + 1:
+            raise ValueError(f"Demasiados climas distintos para el almacén ({len(self.climas) + len(nuevos)}).")
+        codigos = pd.Categorical(climas, categories=self.climas + nuevos).codes
+        if (codigos < 0).any():
+            raise ValueError("Hay ventas sin clima.")
+        return codigos.astype(TIPO_CODIGO), nuevos
+
+    def agregar(self, ventas, importacion=False):
+        """
+        Añade un DataFrame con las columnas de pankira.csv (por ejemplo el
+        resultado de datos_ventas.cargar_ventas). Las filas se reparten por año.
+        Solo se añade a un almacén con historial; para llenar uno vacío
+        (importar_csv, generador_ventas) se pasa importacion=True. Todo se
+        comprueba antes de escribir nada, esquema incluido.
+        """
+        if not importacion and not len(self):
+            raise ValueError(f"El almacén '{self.carpeta}' está vacío: primero importa el historial "
+                             f"(python almacen_ventas.py importar).")
+        fechas = pd.to_datetime(ventas["Fecha"]).to_numpy().astype(TIPO_FECHA)
+        if np.isnat(fechas).any():
+            raise ValueError("Hay ventas sin fecha.")
+        dias = pd.Categorical(ventas["Dia_De_La_Semana"], categories=DIAS).codes
+        if (dias < 0).any():
+            raise ValueError(f"Días no válidos en las ventas. Valores válidos: {DIAS}")
+        limite = np.iinfo(TIPO_CANTIDAD).max
+        cantidades = {}
+        for pan in PANES:
+            valores = np.asarray(ventas[pan])
+            if ((valores < 0) | (valores > limite)).any():
+                raise ValueError(f"Cantidades de '{pan}' fuera del rango 0-{limite}.")
+            cantidades[pan] = valores.astype(TIPO_CANTIDAD)
+        codigos_clima, climas_nuevos = self._codigos_clima(ventas["Clima"])
+        columnas = {
+            "Fecha": fechas,
+            "Dia_De_La_Semana": dias.astype(TIPO_CODIGO),
+            **cantidades,
+            "Clima": codigos_clima,
+        }
+
+        anios = fechas.astype("M8[Y]").astype(np.int64) + 1970
+        # Cada fecha se guarda una sola vez: se revisa antes de escribir en ninguna partición
+        unicas, veces = np.unique(fechas, return_counts=True)
+        if (veces > 1).any():
+            raise ValueError(f"Fechas repetidas en las ventas: {[str(f) for f in unicas[veces > 1][:10]]}.")
+        for anio in np.unique(anios):
+            repetidas = self._fechas_guardadas(int(anio), fechas[anios == anio])
+            if len(repetidas):
+                raise ValueError(f"Ya hay ventas guardadas de las fechas {[str(f) for f in repetidas[:10]]}.")
+
+        if climas_nuevos or not self.existe():
+            for clima in climas_nuevos:
+                self.codigo_clima[clima] = len(self.climas)
+                self.climas.append(clima)
+            self._guardar_esquema()
+        for anio in np.unique(anios):
+            filas = anios == anio
+            self._agregar_particion(int(anio), {columna: valores[filas] for columna, valores in columnas.items()})
+
+    def agregar_dia(self, fecha, clima, cantidades):
+        """
+        Añade las ventas de un día. 'cantidades' es un diccionario pan -> unidades
+        (los panes que falten cuentan como 0); el día de la semana sale de la fecha.
+        """
+        fecha = np.datetime64(fecha, "D")
+        dia = DIAS[int(numero_dia_semana(fecha))]
+        fila = {"Fecha": [fecha], "Dia_De_La_Semana": [dia], "Clima": [clima]}
+        fila.update({pan: [cantidades.get(pan, 0)] for pan in PANES})
+        self.agregar(fila)
+        return dia
+
+    def _fechas_guardadas(self, anio, fechas):
+        """Las 'fechas' que ya están en la partición del año (leída mapeada en memoria)."""
+        filas = self._filas(anio)
+        if filas == 0:
+            return fechas[:0]
+        guardadas = np.memmap(self._ruta(anio, "Fecha"), dtype=TIPO_FECHA, mode="r", shape=(filas,))
+        return fechas[np.isin(fechas, guardadas)]
+
+    def _agregar_particion(self, anio, columnas):
+        carpeta = os.path.join(self.carpeta, str(anio))
+        os.makedirs(carpeta, exist_ok=True)
+        # Se descartan las filas a medias que haya dejado una escritura interrumpida
+        completas = self._filas(anio)
+        for columna in self.columnas:
+            ruta = self._ruta(anio, columna)
+            with open(ruta, "ab") as f:
+                f.truncate(completas * _tipo_columna(columna).itemsize)
+                f.write(np.ascontiguousarray(columnas[columna], dtype=_tipo_columna(columna)).tobytes())
+
+    def columna(self, nombre, desde=None, hasta=None):
+        """Valores de una columna (códigos para día y clima) entre dos fechas, ambas incluidas."""
+        return self._leer([nombre], desde, hasta)[nombre]
+
+    def _leer(self, columnas, desde, hasta):
+        desde = None if desde is None else np.datetime64(desde, "D")
+        hasta = None if hasta is None else np.datetime64(hasta, "D")
+        partes = {columna: [] for columna in columnas}
+        for anio in self.particiones():
+            if desde is not None and anio < desde.astype("M8[Y]").astype(np.int64) + 1970:
+                continue
+            if hasta is not None and anio > hasta.astype("M8[Y]").astype(np.int64) + 1970:
+                continue
+            filas = self._filas(anio)
+            if filas == 0:
+                continue
+            mapeadas = {columna: np.memmap(self._ruta(anio, columna), dtype=_tipo_columna(columna), mode="r",
+                                           shape=(filas,)) for columna in set(columnas) | {"Fecha"}}
+            seleccion = slice(None)
+            if desde is not None or hasta is not None:
+                fechas = mapeadas["Fecha"]
+                seleccion = np.ones(filas, dtype=bool)
+                if desde is not None:
+                    seleccion &= fechas >= desde
+                if hasta is not None:
+                    seleccion &= fechas <= hasta
+            for columna in columnas:
+                partes[columna].append(np.asarray(mapeadas[columna][seleccion]))
+        # Con una sola partición se devuelve la vista mapeada, sin copiar
+        return {columna: valores[0] if len(valores) == 1 else
+                np.concatenate(valores) if valores else np.empty(0, dtype=_tipo_columna(columna))
+                for columna, valores in partes.items()}
+
+    def leer(self, columnas=None, desde=None, hasta=None):
+        """
+        DataFrame con el mismo esquema que datos_ventas.cargar_ventas, solo con
+        las 'columnas' pedidas (por defecto todas) y las filas entre 'desde' y
+        'hasta' (fechas incluidas; None = sin límite).
+        """
+        columnas = self.columnas if columnas is None else [c for c in self.columnas if c in columnas]
+        datos = self._leer(columnas, desde, hasta)
+        ventas = pd.DataFrame()
+        for columna in columnas:
+            valores = datos[columna]
+            if columna in COLUMNAS_CATEGORIAS:
+                # Mismo orden de categorías que al leer el CSV: alfabético y solo las presentes
+                textos = DIAS if columna == "Dia_De_La_Semana" else self.climas
+                presentes = sorted(np.flatnonzero(np.bincount(valores, minlength=len(textos))), key=textos.__getitem__)
+                nuevo_codigo = np.full(len(textos), -1, dtype=np.int16)
+                nuevo_codigo[presentes] = np.arange(len(presentes))
+                valores = pd.Categorical.from_codes(nuevo_codigo[valores], categories=[textos[i] for i in presentes])
+            elif columna == "Fecha":
+                valores = valores.astype("M8[us]")
+            ventas[columna] = valores
+        return ventas
+
+
+def importar_csv(ruta=RUTA_VENTAS, carpeta=CARPETA_ALMACEN):
+    """
+    Importa el historial CSV al almacén (se hace una sola vez). Se lee por
+    bloques con datos_ventas; devuelve la lista de filas descartadas.
+    """
+    almacen = AlmacenVentas(carpeta)
+    if len(almacen):
+        raise ValueError(f"El almacén '{carpeta}' ya tiene datos; las ventas nuevas se añaden con agregar_dia.")
+    errores = []
+    for ventas, errores_bloque in leer_ventas_por_bloques(ruta):
+        almacen.agregar(ventas, importacion=True)
+        errores.extend(errores_bloque)
+    return errores
+
+
+def cargar_historial(columnas=None, desde=None, hasta=None, carpeta=CARPETA_ALMACEN, ruta_csv=RUTA_VENTAS):
+    """
+    Historial de ventas para entrenar o analizar: del almacén si ya se importó
+    (tiene filas) y, si no, del CSV. Devuelve (ventas, errores) como
+    datos_ventas.cargar_ventas.
+    """
+    almacen = AlmacenVentas(carpeta)
+    if len(almacen):
+        pedidas = None if columnas is None else ["Fecha"] + COLUMNAS_CATEGORIAS + list(columnas)
+        return almacen.leer(pedidas, desde, hasta), []
+
+    ventas, errores = cargar_ventas(ruta_csv, columnas=columnas)
+    if desde is not None:
+        ventas = ventas[ventas["Fecha"] >= pd.Timestamp(desde)]
+    if hasta is not None:
+        ventas = ventas[ventas["Fecha"] <= pd.Timestamp(hasta)]
+    return ventas.reset_index(drop=True), errores
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Almacén columnar del historial de ventas.")
+    subcomandos = parser.add_subparsers(dest="accion", required=True)
+    importar = subcomandos.add_parser("importar", help="Importa pankira.csv al almacén (una sola vez).")
+    importar.add_argument("--csv", default=RUTA_VENTAS, help=f"CSV a importar (por defecto '{RUTA_VENTAS}').")
+    agregar = subcomandos.add_parser("agregar", help="Añade las ventas del cierre de un día.")
+    agregar.add_argument("--fecha", required=True, help="Fecha del día (AAAA-MM-DD).")
+    agregar.add_argument("--clima", required=True, help="Clima del día.")
+    agregar.add_argument("--cantidades", type=int, nargs=len(PANES), required=True, metavar="N",
+                         help=f"Unidades vendidas de cada pan, en este orden: {', '.join(PANES)}.")
+    parser.add_argument("--carpeta", default=CARPETA_ALMACEN, help=f"Carpeta del almacén (por defecto '{CARPETA_ALMACEN}').")
+    args = parser.parse_args()
+
+    if args.accion == "importar":
+        from datos_ventas import resumen_errores
+        try:
+            errores = importar_csv(args.csv, args.carpeta)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if errores:
+            print(resumen_errores(errores))
+        print(f"Historial importado en '{args.carpeta}' ({len(AlmacenVentas(args.carpeta))} días).")
+    else:
+        from promedios_ventas import PromediosVentas, RUTA_ESTADISTICAS, registrar_dia
+        cantidades = dict(zip(PANES, args.cantidades))
+        almacen = AlmacenVentas(args.carpeta)
+        try:
+            dia = almacen.agregar_dia(args.fecha, args.clima, cantidades)
+        except ValueError as e:
+            # No se añadió nada al almacén: las estadísticas tampoco se tocan
+            print(f"Error: {e}")
+            sys.exit(1)
+        if os.path.exists(RUTA_ESTADISTICAS):
+            # Los promedios de ofertas se actualizan con el mismo cierre, sin releer el historial
+            registrar_dia(dia, args.clima, cantidades)
+        else:
+            # Aún no hay estadísticas: se calculan con el historial completo, que ya incluye este día
+            PromediosVentas.desde_ventas(almacen.leer()).guardar()
+        print(f"Ventas del {dia} {args.fecha} ({args.clima}) añadidas al almacén y a las estadísticas de ventas.")
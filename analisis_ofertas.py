@@ -1,43 +1,50 @@
-import pandas as pd
 import joblib
 import os
-
-print("Iniciando análisis de ventas históricas para recomendaciones...")
-
-# Lista de panes (la misma que en tu script de entrenamiento)
-PANES = [
-    "Pan_Canilla_Cantidad",
-    "Pan_Frances_Cantidad",
-    "Pan_Colombiano_Cantidad",
-    "Pan_Sobao_Cantidad",
-    "Pan_Dulce_Cantidad",
-    "Pan_De_Coco_Cantidad",
-    "Pan_De_Arequipe_Cantidad"
-]
-
-# Cargar el dataset
-try:
-    df = pd.read_csv("pankira.csv")
-except FileNotFoundError:
-    print("Error: No se encontró el archivo 'pankira.csv'. Asegúrate de que esté en la carpeta correcta.")
-    exit()
-
-# Asegurarse de que los datos de los panes son numéricos
-for pan in PANES:
-    df[pan] = pd.to_numeric(df[pan], errors='coerce')
-
-# Diccionario para almacenar los promedios de ventas
-promedios_ventas = {}
-
-# Calcular el promedio de ventas para cada tipo de pan por día de la semana
-for pan in PANES:
-    # Agrupar por día de la semana y calcular la media de ventas para el pan actual
-    promedio_por_dia = df.groupby('Dia_De_La_Semana')[pan].mean().round(0).to_dict()
-    promedios_ventas[pan] = promedio_por_dia
-
-# Guardar el diccionario de promedios en un archivo .pkl para usarlo en la app
-os.makedirs("models", exist_ok=True)  # Asegurarse de que la carpeta 'models' exista
-ruta_guardado = "models/promedios_ventas.pkl"
-joblib.dump(promedios_ventas, ruta_guardado)
-
-print(f"Análisis completado. Los promedios de ventas se han guardado en '{ruta_guardado}'.")
+from datos_ventas import PANES, RUTA_VENTAS, resumen_errores
+from almacen_ventas import cargar_historial
+from promedios_ventas import PromediosVentas, RUTA_ESTADISTICAS
+
+# Promedios de ventas por pan y día de la semana que usa la pantalla de ofertas
+RUTA_PROMEDIOS = "models/promedios_ventas.pkl"
+
+
+def calcular_promedios(ventas, panes=PANES):
+    """
+    Promedio de ventas de cada pan por día de la semana, redondeado a unidades:
+    diccionario pan -> {día: promedio}.
+    """
+    return PromediosVentas.desde_ventas(ventas, panes).promedios_por_dia()
+
+
+def guardar_promedios(promedios, ruta=RUTA_PROMEDIOS):
+    """Guarda los promedios en un .pkl para usarlos en la app."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)  # Asegurarse de que la carpeta 'models' exista
+    joblib.dump(promedios, ruta)
+
+
+def actualizar_promedios(ventas, panes=PANES, ruta_estadisticas=RUTA_ESTADISTICAS, ruta_promedios=RUTA_PROMEDIOS):
+    """
+    Recalcula en una sola pasada las estadísticas de ventas (que lee la app y
+    que después se actualizan día a día) y el .pkl de promedios que va en el paquete.
+    """
+    estadisticas = PromediosVentas.desde_ventas(ventas, panes)
+    estadisticas.guardar(ruta_estadisticas)
+    guardar_promedios(estadisticas.promedios_por_dia(), ruta_promedios)
+    return estadisticas
+
+
+if __name__ == "__main__":
+    print("Iniciando análisis de ventas históricas para recomendaciones...")
+
+    # Cargar el dataset
+    try:
+        ventas, errores = cargar_historial()
+    except FileNotFoundError:
+        print(f"Error: No se encontró el archivo '{RUTA_VENTAS}'. Asegúrate de que esté en la carpeta correcta.")
+        raise SystemExit(1)
+    if errores:
+        print(resumen_errores(errores))
+
+    actualizar_promedios(ventas)
+    print(f"Análisis completado. Los promedios de ventas se han guardado en '{RUTA_PROMEDIOS}' "
+          f"y las estadísticas en '{RUTA_ESTADISTICAS}'.")
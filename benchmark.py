@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+from registro_modelos import RegistroModelos
+from predictor_panes import cargar_predictor
+from reglas_ofertas import detectar_ofertas
+from datos_ventas import PANES, RUTA_VENTAS, cargar_ventas
+from almacen_ventas import AlmacenVentas, importar_csv
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+
+def resumir(tiempos):
+    """Estadísticas en milisegundos de una lista de tiempos en segundos."""
+    ms = np.array(tiempos) * 1000
+    return {
+        "repeticiones": len(ms),
+        "media_ms": float(ms.mean()),
+        "mediana_ms": float(np.median(ms)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "min_ms": float(ms.min()),
+        "max_ms": float(ms.max()),
+    }
+
+
+def medir(funcion, repeticiones, calentamiento=1):
+    """Ejecuta la función varias veces (después de calentar) y resume los tiempos."""
+    for _ in range(calentamiento):
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resumir(tiempos)
+
+
+def medir_importacion_en_frio(modulo, repeticiones):
+    """Tiempo de importar un módulo en un proceso nuevo (sin caché de módulos de Python)."""
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=CARPETA, capture_output=True, text=True, check=True)
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]))
+    return resumir(tiempos)
+
+
+def medir_carga_ventas(repeticiones, ruta):
+    """Tiempo de cargar el historial de ventas y memoria que ocupa ya cargado."""
+    resultado = medir(lambda: cargar_ventas(ruta), repeticiones)
+    ventas, errores = cargar_ventas(ruta)
+    resultado.update({"filas": len(ventas), "filas_descartadas": len({error["linea"] for error in errores}),
+                      "memoria_bytes": int(ventas.memory_usage(deep=True).sum())})
+    return resultado
+
+
+def medir_carga_almacen(repeticiones, ruta):
+    """Tiempo de leer el historial del almacén columnar (importado a una carpeta temporal)."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        importar_csv(ruta, carpeta)
+        almacen = AlmacenVentas(carpeta)
+        return medir(lambda: almacen.leer(), repeticiones)
+
+
+def cargar_keras(pan, carpeta_modelos, X):
+    """
+    Modelo Keras de un pan para los escenarios con --keras: el modelo, un
+    PredictorPorPan que lo usa y la entrada 'X' como la recibe model.predict.
+    """
+    from predictor_panes import PredictorPorPan, ModeloEscalado
+    from motor_numpy import cargar_modelo
+
+    modelo = cargar_modelo(pan, carpeta_modelos, usar_keras=True)
+    if modelo.en_unidades:
+        return {"modelo": modelo, "predictor": PredictorPorPan({pan: modelo}), "X": X}
+    import joblib
+    scaler_X = joblib.load(os.path.join(carpeta_modelos, f"scaler_X_{pan}.pkl"))
+    scaler_y = joblib.load(os.path.join(carpeta_modelos, f"scaler_y_{pan}.pkl"))
+    return {"modelo": modelo, "predictor": PredictorPorPan({pan: ModeloEscalado(modelo, scaler_X, scaler_y)}),
+            "X": scaler_X.transform(X)}
+
+
+def medir_entrenamiento(epocas, ruta, batch_size=None):
+    """
+    Tiempo y muestras por segundo al entrenar el modelo de cada pan, sin guardar
+    nada en 'models'. 'batch_size' sustituye al de HIPERPARAMETROS.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from entrenar_y_guardar import construir_modelo, entrenar, HIPERPARAMETROS
+    from datos_entrenamiento import DatosEntrenamiento
+
+    hiperparametros = {**HIPERPARAMETROS, "batch_size": batch_size or HIPERPARAMETROS["batch_size"]}
+    df, _ = cargar_ventas(ruta)
+    X = np.column_stack([LabelEncoder().fit_transform(df["Dia_De_La_Semana"]),
+                         LabelEncoder().fit_transform(df["Clima"])])
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, df[PANES].values, test_size=HIPERPARAMETROS["test_size"], random_state=HIPERPARAMETROS["random_state"]
+    )
+    scaler_X = StandardScaler().fit(X_train)
+    datos = DatosEntrenamiento(X_train, y_train, X_test, y_test, PANES, hiperparametros["batch_size"])
+
+    resultados = {}
+    for k, pan in enumerate(PANES):
+        scaler_y = StandardScaler().fit(y_train[:, [k]])
+        inicio = time.perf_counter()
+        model = construir_modelo()
+        history, muestras_por_segundo = entrenar(model, datos, [pan], scaler_X, scaler_y,
+                                                 hiperparametros=hiperparametros, epocas=epocas)
+        segundos = time.perf_counter() - inicio
+        resultados[pan] = {"segundos": segundos, "epocas": len(history.history["loss"]),
+                           "ms_por_epoca": segundos * 1000 / len(history.history["loss"]),
+                           "muestras_por_segundo": muestras_por_segundo,
+                           "val_loss": float(min(history.history["val_loss"]))}
+    resultados["batch_size"] = hiperparametros["batch_size"]
+    resultados["muestras_por_segundo"] = float(np.mean([resultados[pan]["muestras_por_segundo"] for pan in PANES]))
+    return resultados
+
+
+def ejecutar(args):
+    """Ejecuta todos los escenarios y devuelve el diccionario de resultados."""
+    carpeta_modelos = os.path.join(CARPETA, args.carpeta_modelos)
+    escenarios = {}
+
+    # Historial con el que se miden la carga de ventas y el entrenamiento: pankira.csv
+    # o, con --filas-sinteticas, uno simulado del tamaño indicado (ver generador_ventas)
+    ruta_ventas = os.path.join(CARPETA, RUTA_VENTAS)
+    temporal = tempfile.TemporaryDirectory()
+    if args.filas_sinteticas:
+        from generador_ventas import escribir_csv
+        ruta_ventas = os.path.join(temporal.name, "ventas_simuladas.csv")
+        print(f"- generando {args.filas_sinteticas} filas simuladas...", flush=True)
+        escribir_csv(ruta_ventas, args.filas_sinteticas, sucursales=args.sucursales)
+
+    def escenario(nombre, funcion):
+        print(f"- {nombre}...", flush=True)
+        try:
+            escenarios[nombre] = funcion()
+        except Exception as e:
+            escenarios[nombre] = {"error": str(e)}
+
+    # Arranque: importar las pantallas en un proceso nuevo
+    escenario("importacion_main", lambda: medir_importacion_en_frio("main", args.repeticiones_frio))
+    escenario("importacion_interpretar_ofertas",
+              lambda: medir_importacion_en_frio("interpretar_ofertas", args.repeticiones_frio))
+
+    # Carga de artefactos
+    escenario("carga_registro", lambda: medir(lambda: RegistroModelos(carpeta=carpeta_modelos), args.repeticiones_carga))
+    escenario("carga_modelos", lambda: medir(lambda: cargar_predictor(PANES, carpeta_modelos), args.repeticiones_carga))
+    escenario("carga_ventas", lambda: medir_carga_ventas(args.repeticiones_carga, ruta_ventas))
+    if args.filas_sinteticas and args.sucursales > 1:
+        # El almacén guarda una fila por fecha: un historial con varias sucursales no se puede importar
+        motivo = "el almacén guarda una fila por fecha y el historial simulado tiene varias sucursales"
+        print(f"- carga_ventas_almacen: omitido ({motivo})", flush=True)
+        escenarios["carga_ventas_almacen"] = {"omitido": motivo}
+    else:
+        escenario("carga_ventas_almacen", lambda: medir_carga_almacen(args.repeticiones_carga, ruta_ventas))
+
+    registro = RegistroModelos(carpeta=carpeta_modelos)
+    predictor = cargar_predictor(PANES, carpeta_modelos)
+    dia, clima, pan = registro.DIAS_SEMANA[0], registro.CLIMAS[0], PANES[0]
+    X_uno = registro.indice.codificar(dia, clima)
+
+    # Predicción individual (lo que hace 'Calcular Predicción')
+    escenario("prediccion_individual", lambda: medir(lambda: registro.predecir(dia, clima, pan), args.repeticiones))
+    escenario("prediccion_individual_modelo",
+              lambda: medir(lambda: predictor.predecir(X_uno, [pan]), args.repeticiones))
+    if args.keras:
+        keras_pan = {}
+
+        def con_keras(medicion):
+            # El modelo se carga dentro del escenario: si falta el .keras, solo ese escenario queda con error
+            def funcion():
+                if not keras_pan:
+                    keras_pan.update(cargar_keras(pan, carpeta_modelos, X_uno))
+                return medicion(**keras_pan)
+            return funcion
+
+        escenario("prediccion_individual_keras", con_keras(
+            lambda predictor, **_: medir(lambda: predictor.predecir(X_uno, [pan]), args.repeticiones)))
+        # Referencia: model.predict de Keras, sin la llamada compilada de ModeloKerasRapido
+        escenario("prediccion_individual_keras_predict", con_keras(
+            lambda modelo, X, **_: medir(lambda: modelo.model.predict(X, verbose=0), args.repeticiones_carga)))
+
+    # Predicción por lotes
+    rng = np.random.default_rng(0)
+    for filas in (365, 10_000):
+        X = np.column_stack([rng.integers(0, len(registro.indice.dias), filas),
+                             rng.integers(0, len(registro.indice.climas), filas)])
+        escenario(f"prediccion_lote_{filas}", lambda X=X: medir(lambda: registro.predecir_lote(X), args.repeticiones_carga))
+        escenario(f"prediccion_lote_{filas}_modelo",
+                  lambda X=X: medir(lambda: predictor.predecir(X), args.repeticiones_carga))
+
+    # Análisis completo de ofertas (lo que hace 'Analizar y Recomendar Ofertas', sin Tk)
+    promedios = registro.obtener_promedios()
+    escenario("analisis_ofertas", lambda: medir(
+        lambda: detectar_ofertas(registro.predecir_todos(dia, clima), promedios, dia, PANES), args.repeticiones))
+
+    if args.entrenamiento:
+        escenario("entrenamiento_por_pan", lambda: medir_entrenamiento(args.epocas, ruta_ventas, args.batch_size))
+    temporal.cleanup()
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesadores": os.cpu_count(),
+        "filas_sinteticas": args.filas_sinteticas,
+        "escenarios": escenarios,
+    }
+
+
+def comparar(base, actual):
+    """Imprime la mediana de cada escenario en las dos ejecuciones y el cociente actual/base."""
+    print(f"{'escenario':<40} {'base (ms)':>12} {'actual (ms)':>12} {'actual/base':>12}")
+    for nombre, resultado in actual["escenarios"].items():
+        anterior = base["escenarios"].get(nombre, {})
+        if "mediana_ms" not in resultado or "mediana_ms" not in anterior:
+            continue
+        cociente = resultado["mediana_ms"] / anterior["mediana_ms"] if anterior["mediana_ms"] else float("nan")
+        print(f"{nombre:<40} {anterior['mediana_ms']:>12.3f} {resultado['mediana_ms']:>12.3f} {cociente:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide arranque, carga de modelos, inferencia y entrenamiento (sin Tk).")
+    parser.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados (por defecto 'benchmark.json').")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior con el que comparar los resultados.")
+    parser.add_argument("--carpeta-modelos", default="models", help="Carpeta con los modelos (por defecto 'models').")
+    parser.add_argument("--repeticiones", type=int, default=200, help="Repeticiones de los escenarios rápidos.")
+    parser.add_argument("--repeticiones-carga", type=int, default=10, help="Repeticiones de la carga de artefactos y los lotes.")
+    parser.add_argument("--repeticiones-frio", type=int, default=3, help="Repeticiones de las importaciones en frío.")
+    parser.add_argument("--keras", action="store_true", help="Incluye la predicción individual con Keras (requiere TensorFlow).")
+    parser.add_argument("--entrenamiento", action="store_true", help="Incluye el tiempo de entrenamiento de cada modelo (lento).")
+    parser.add_argument("--epocas", type=int, default=None,
+                        help="Épocas por modelo al medir el entrenamiento (por defecto las de HIPERPARAMETROS).")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Filas por lote al medir el entrenamiento (por defecto el de HIPERPARAMETROS).")
+    parser.add_argument("--filas-sinteticas", type=int, default=0,
+                        help="Mide la carga de ventas y el entrenamiento con un historial simulado de estas filas.")
+    parser.add_argument("--sucursales", type=int, default=1, help="Sucursales del historial simulado (por defecto 1).")
+    args = parser.parse_args()
+    if args.filas_sinteticas:
+        from generador_ventas import FECHA_MAXIMA, ultima_fecha
+        if ultima_fecha(args.filas_sinteticas, args.sucursales) > FECHA_MAXIMA:
+            parser.error(f"el historial simulado pasaría de {FECHA_MAXIMA} (una fecha por cada --sucursales filas): "
+                         f"usa más --sucursales o menos --filas-sinteticas")
+
+    resultados = ejecutar(args)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en '{args.salida}'.")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), resultados)
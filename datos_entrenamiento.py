@@ -0,0 +1,151 @@
+import math
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+# La tasa por defecto de Adam, con la que se ajustaron los modelos usando lotes de 8 filas
+TASA_APRENDIZAJE_BASE = 0.001
+BATCH_SIZE_BASE = 8
+# Con lotes mayores la tasa crece con la raíz del tamaño (regla habitual con Adam), sin pasar de este tope
+TASA_APRENDIZAJE_MAXIMA = 0.01
+# Épocas en las que la tasa sube de la base a la escalada antes de empezar a decaer
+EPOCAS_CALENTAMIENTO = 5
+# Fracción de la tasa máxima a la que llega el decaimiento coseno en la última época
+FRACCION_TASA_FINAL = 0.1
+
+# Pasos de entrenamiento por cada llamada a la función compilada: reduce el coste
+# de Python por paso, que domina con lotes pequeños. No cambia lo que se aprende.
+PASOS_POR_EJECUCION = 32
+
+# Lotes grandes para validar: el resultado es el mismo que con el batch de entrenamiento
+BATCH_SIZE_VALIDACION = 4096
+
+
+def tasa_aprendizaje(batch_size, pasos_por_epoca, epocas):
+    """
+    Tasa de aprendizaje para un tamaño de lote: la base con lotes de
+    BATCH_SIZE_BASE filas o menos; con lotes mayores, un calentamiento lineal
+    hasta la tasa escalada y después un decaimiento coseno.
+    """
+    if batch_size <= BATCH_SIZE_BASE:
+        return TASA_APRENDIZAJE_BASE
+    maxima = min(TASA_APRENDIZAJE_BASE * math.sqrt(batch_size / BATCH_SIZE_BASE), TASA_APRENDIZAJE_MAXIMA)
+    pasos = max(1, pasos_por_epoca * epocas)
+    calentamiento = min(EPOCAS_CALENTAMIENTO * pasos_por_epoca, pasos // 2)
+    return keras.optimizers.schedules.CosineDecay(
+        initial_learning_rate=TASA_APRENDIZAJE_BASE,
+        decay_steps=max(1, pasos - calentamiento),
+        alpha=FRACCION_TASA_FINAL,  # relativa a warmup_target, la tasa máxima
+        warmup_target=maxima,
+        warmup_steps=calentamiento,
+    )
+
+
+class DatosEntrenamiento:
+    """
+    Datos de entrenamiento y prueba convertidos una sola vez a tensores float32
+    en memoria, con las cantidades de todos los panes, para todos los modelos.
+    Cada modelo obtiene su tf.data.Dataset eligiendo columnas y scalers; en cada
+    época se baraja el conjunto completo con una sola operación vectorizada y
+    los lotes salen por reshape, sin trabajo por fila en Python ni en tf.data.
+    """
+
+    def __init__(self, X_train, Y_train, X_test, Y_test, panes, batch_size=BATCH_SIZE_BASE):
+        self.X_train = np.asarray(X_train, dtype=np.float32)
+        self.Y_train = np.asarray(Y_train, dtype=np.float32)
+        self.X_test = np.asarray(X_test, dtype=np.float32)
+        self.Y_test = np.asarray(Y_test, dtype=np.float32)
+        self.panes = list(panes)
+        self.batch_size = batch_size
+        self._tensores = None
+
+    def __getstate__(self):
+        # Los tensores no se envían a otros procesos; cada uno los crea al usarlos
+        estado = self.__dict__.copy()
+        estado["_tensores"] = None
+        return estado
+
+    @property
+    def filas(self):
+        return len(self.X_train)
+
+    @property
+    def pasos_por_epoca(self):
+        return -(-self.filas // self.batch_size)
+
+    def _tensores_en_memoria(self):
+        if self._tensores is None:
+            self._tensores = tuple(tf.constant(arreglo) for arreglo in
+                                   (self.X_train, self.Y_train, self.X_test, self.Y_test))
+        return self._tensores
+
+    def _escalados(self, X, Y, panes, scaler_X, scaler_y):
+        """Entradas y columnas 'panes' escaladas con la media y la escala de los scalers ajustados."""
+        columnas = [self.panes.index(pan) for pan in panes]
+        x = (X - scaler_X.mean_.astype(np.float32)) / scaler_X.scale_.astype(np.float32)
+        y = (tf.gather(Y, columnas, axis=1) - scaler_y.mean_.astype(np.float32)) / scaler_y.scale_.astype(np.float32)
+        return x, y
+
+    def entrenamiento(self, panes, scaler_X, scaler_y):
+        """
+        Lotes barajados de las columnas 'panes', ya escalados, sin fin: cada
+        pasos_por_epoca lotes forman una época con otra permutación (se entrena
+        con steps_per_epoch=pasos_por_epoca). La época siguiente se prepara
+        mientras se entrena la actual.
+        """
+        X, Y, _, _ = self._tensores_en_memoria()
+        x, y = self._escalados(X, Y, panes, scaler_X, scaler_y)
+        filas, batch_size = self.filas, self.batch_size
+        completas = filas // batch_size * batch_size
+
+        def barajar(_):
+            permutacion = tf.random.shuffle(tf.range(filas))
+            return tf.gather(x, permutacion), tf.gather(y, permutacion)
+
+        def lotes(x_epoca, y_epoca):
+            # Los lotes completos son una vista (lotes, batch_size, columnas); el resto va en un lote final
+            resultado = tf.data.Dataset.from_tensor_slices((
+                tf.reshape(x_epoca[:completas], (-1, batch_size, x_epoca.shape[1])),
+                tf.reshape(y_epoca[:completas], (-1, batch_size, y_epoca.shape[1])),
+            ))
+            if completas < filas:
+                resultado = resultado.concatenate(tf.data.Dataset.from_tensors((x_epoca[completas:], y_epoca[completas:])))
+            return resultado
+
+        return tf.data.Dataset.range(1).repeat().map(barajar).flat_map(lotes).prefetch(tf.data.AUTOTUNE)
+
+    def validacion(self, panes, scaler_X, scaler_y):
+        """Datos de prueba de las columnas 'panes', escalados, en lotes grandes y sin barajar."""
+        _, _, X, Y = self._tensores_en_memoria()
+        x, y = self._escalados(X, Y, panes, scaler_X, scaler_y)
+        return tf.data.Dataset.from_tensor_slices((x, y)).batch(BATCH_SIZE_VALIDACION).cache()
+
+
+class MedidorRendimiento(keras.callbacks.Callback):
+    """Mide las muestras de entrenamiento por segundo de cada época (sin contar la validación)."""
+
+    def __init__(self, muestras_por_epoca):
+        super().__init__()
+        self.muestras_por_epoca = muestras_por_epoca
+        self.por_epoca = []
+        self._inicio = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._inicio = time.perf_counter()
+
+    def on_test_begin(self, logs=None):
+        # La validación se ejecuta al final de cada época: se cierra ahí la medida
+        if self._inicio is not None:
+            self.por_epoca.append(self.muestras_por_epoca / (time.perf_counter() - self._inicio))
+            self._inicio = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self._inicio is not None:
+            self.on_test_begin()
+
+    @property
+    def muestras_por_segundo(self):
+        """Media de las épocas; la primera se descarta si hay más, porque incluye la compilación."""
+        epocas = self.por_epoca[1:] or self.por_epoca
+        return float(np.mean(epocas)) if epocas else 0.0
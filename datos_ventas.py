@@ -0,0 +1,140 @@
+import numpy as np
+
+# pandas se importa dentro de las funciones que leen el CSV: las apps importan
+# de aquí solo las constantes (PANES, DIAS) y no deben cargarlo al arrancar
+
+# Historial de ventas diarias usado para entrenar y para los promedios de ofertas
+RUTA_VENTAS = "pankira.csv"
+
+PANES = [
+    "Pan_Canilla_Cantidad",
+    "Pan_Frances_Cantidad",
+    "Pan_Colombiano_Cantidad",
+    "Pan_Sobao_Cantidad",
+    "Pan_Dulce_Cantidad",
+    "Pan_De_Coco_Cantidad",
+    "Pan_De_Arequipe_Cantidad"
+]
+
+DIAS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+# Esquema del CSV: día y clima como categorías (cada texto se guarda una sola
+# vez), cantidades como enteros sin signo de 16 bits y la fecha ya convertida.
+COLUMNAS_CATEGORIAS = ["Dia_De_La_Semana", "Clima"]
+TIPO_CANTIDAD = np.uint16
+FORMATO_FECHA = "%Y-%m-%d"
+
+# Filas por bloque al leer por partes
+FILAS_POR_BLOQUE = 100_000
+
+
+def numero_dia_semana(fechas):
+    """Posición en DIAS (0 = lunes) del día de la semana de una fecha o de un arreglo de fechas."""
+    # El día 0 de datetime64 (1970-01-01) fue jueves, la posición 3 de DIAS
+    return (np.asarray(fechas, dtype="M8[D]").astype(np.int64) + 3) % 7
+
+
+def leer_ventas_por_bloques(ruta=RUTA_VENTAS, filas_por_bloque=FILAS_POR_BLOQUE, columnas=None):
+    """
+    Lee el historial por bloques de 'filas_por_bloque' filas. Por cada bloque
+    devuelve (ventas, errores): las filas válidas con el esquema aplicado y una
+    lista de filas descartadas, cada una un diccionario con la línea del CSV,
+    la columna, el valor y el motivo. 'columnas' limita los panes leídos.
+    """
+    import pandas as pd
+
+    panes = PANES if columnas is None else [pan for pan in PANES if pan in columnas]
+    usadas = ["Fecha"] + COLUMNAS_CATEGORIAS + panes
+    # Las cantidades se leen sin tipo fijo: un valor no numérico no debe detener la lectura
+    tipos = {columna: "category" for columna in COLUMNAS_CATEGORIAS}
+    tipos["Fecha"] = str
+    lector = pd.read_csv(ruta, usecols=usadas, dtype=tipos, chunksize=filas_por_bloque)
+    for bloque in lector:
+        yield _aplicar_esquema(bloque, panes)
+
+
+def _aplicar_esquema(bloque, panes):
+    """Convierte un bloque leído al esquema y separa las filas que no lo cumplen."""
+    import pandas as pd
+
+    errores = []
+    invalidas = np.zeros(len(bloque), dtype=bool)
+    lineas = bloque.index.to_numpy() + 2  # Línea en el CSV (la 1 es la cabecera)
+
+    def descartar(mascara, columna, valores, motivo):
+        mascara = np.asarray(mascara, dtype=bool)
+        for k in np.flatnonzero(mascara):
+            valor = valores[k].item() if isinstance(valores[k], np.generic) else valores[k]
+            errores.append({"linea": int(lineas[k]), "columna": columna, "valor": valor, "motivo": motivo})
+        invalidas[mascara] = True
+
+    fechas = pd.to_datetime(bloque["Fecha"], format=FORMATO_FECHA, errors="coerce")
+    descartar(fechas.isna().to_numpy(), "Fecha", bloque["Fecha"].to_numpy(), "fecha no válida")
+
+    dias = bloque["Dia_De_La_Semana"]
+    descartar((~dias.isin(DIAS)).to_numpy(), "Dia_De_La_Semana", dias.to_numpy(), "día no válido")
+    climas = bloque["Clima"]
+    descartar(climas.isna().to_numpy(), "Clima", climas.to_numpy(), "clima vacío")
+
+    limite = np.iinfo(TIPO_CANTIDAD).max
+    cantidades = {}
+    for pan in panes:
+        original = bloque[pan]
+        if original.dtype.kind in "iu":
+            # Caso habitual: la columna completa ya era entera; basta con revisar el rango
+            valores = original.to_numpy()
+            malos = (valores < 0) | (valores > limite)
+        else:
+            valores = pd.to_numeric(original, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            malos = np.isnan(valores) | (valores < 0) | (valores > limite) | (valores != np.round(valores))
+        descartar(malos, pan, original.to_numpy(), "cantidad no válida")
+        cantidades[pan] = valores
+
+    if invalidas.any():
+        validas = ~invalidas
+        fechas, dias, climas = fechas[validas], dias[validas], climas[validas]
+        dias = dias.cat.remove_unused_categories()
+        climas = climas.cat.remove_unused_categories()
+        cantidades = {pan: valores[validas] for pan, valores in cantidades.items()}
+    ventas = pd.DataFrame({
+        "Fecha": fechas.to_numpy(),
+        "Dia_De_La_Semana": dias.array,
+        **{pan: cantidades[pan].astype(TIPO_CANTIDAD) for pan in panes},
+        "Clima": climas.array,
+    })
+    errores.sort(key=lambda error: error["linea"])
+    return ventas, errores
+
+
+def cargar_ventas(ruta=RUTA_VENTAS, filas_por_bloque=FILAS_POR_BLOQUE, columnas=None):
+    """
+    Carga el historial completo leyendo por bloques. Devuelve (ventas, errores)
+    como leer_ventas_por_bloques; las categorías de día y clima quedan
+    ordenadas alfabéticamente en todo el resultado (el orden de LabelEncoder).
+    """
+    import pandas as pd
+
+    bloques = []
+    errores = []
+    for ventas, errores_bloque in leer_ventas_por_bloques(ruta, filas_por_bloque, columnas):
+        bloques.append(ventas)
+        errores.extend(errores_bloque)
+
+    if len(bloques) > 1:
+        # Todos los bloques deben compartir las mismas categorías; si no, pandas las uniría como texto
+        for columna in COLUMNAS_CATEGORIAS:
+            categorias = sorted(set().union(*(bloque[columna].cat.categories for bloque in bloques)))
+            for bloque in bloques:
+                bloque[columna] = bloque[columna].cat.set_categories(categorias)
+    ventas = pd.concat(bloques, ignore_index=True)
+    return ventas, errores
+
+
+def resumen_errores(errores, maximo=10):
+    """Texto con las primeras filas descartadas, para mostrar al cargar."""
+    lineas = [f"Se descartaron {len({error['linea'] for error in errores})} filas del historial:"]
+    for error in errores[:maximo]:
+        lineas.append(f"  - Línea {error['linea']}, {error['columna']}={error['valor']!r}: {error['motivo']}")
+    if len(errores) > maximo:
+        lineas.append(f"  ... y {len(errores) - maximo} errores más.")
+    return "\n".join(lineas)
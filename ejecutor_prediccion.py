@@ -0,0 +1,74 @@
+import threading
+import tkinter
+from concurrent.futures import ThreadPoolExecutor
+
+# Un único hilo de trabajo para todas las pantallas: las predicciones no
+# bloquean el bucle de eventos de Tk y nunca se ejecutan dos a la vez.
+_ejecutor = None
+_candado = threading.Lock()
+
+
+def _obtener_ejecutor():
+    global _ejecutor
+    if _ejecutor is None:
+        with _candado:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediccion")
+    return _ejecutor
+
+
+class TareasPantalla:
+    """
+    Ejecuta en segundo plano los cálculos de una pantalla y devuelve el
+    resultado al hilo de Tk con after(). Solo cuenta la última petición: si
+    llega otra, la anterior se descarta si aún no empezó y, si ya estaba en
+    marcha, su resultado se ignora.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._generacion = 0
+        self._candado = threading.Lock()
+
+    def enviar(self, calcular, al_terminar, al_fallar):
+        """
+        Programa 'calcular()' en el hilo de trabajo. Después se llama en el hilo
+        de Tk a 'al_terminar(resultado)' o a 'al_fallar(mensaje)', solo si
+        entretanto no se envió otra petición.
+        """
+        with self._candado:
+            self._generacion += 1
+            generacion = self._generacion
+
+        def trabajo():
+            if not self._vigente(generacion):
+                return  # Ya hay una petición más reciente en la cola
+            try:
+                resultado = calcular()
+            except Exception as e:
+                mensaje = str(e)
+                self._publicar(generacion, lambda: al_fallar(mensaje))
+                return
+            self._publicar(generacion, lambda: al_terminar(resultado))
+
+        _obtener_ejecutor().submit(trabajo)
+
+    def cancelar(self):
+        """Descarta la petición en curso (por ejemplo al salir de la pantalla)."""
+        with self._candado:
+            self._generacion += 1
+
+    def _vigente(self, generacion):
+        with self._candado:
+            return generacion == self._generacion
+
+    def _publicar(self, generacion, callback):
+        def entregar():
+            # Se comprueba de nuevo en el hilo de Tk: pudo llegar otra petición mientras tanto
+            if self._vigente(generacion):
+                callback()
+
+        try:
+            self.widget.after(0, entregar)
+        except (RuntimeError, tkinter.TclError):
+            pass  # La ventana ya se cerró
@@ -1,15 +1,32 @@
-import pandas as pd
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from tensorflow import keras
 import joblib
 import sys
 import os
+import argparse
+import json
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from sklearn.model_selection import train_test_split
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from keras.callbacks import EarlyStopping
 from keras.layers import Dropout
 from keras.regularizers import l2
-import subprocess
+from tabla_predicciones import construir_tabla, guardar_tabla
+from datos_ventas import resumen_errores
+from almacen_ventas import cargar_historial
+from analisis_ofertas import actualizar_promedios, RUTA_PROMEDIOS
+from indice_categorias import guardar_indice, RUTA_INDICE_CATEGORIAS
+from paquete_modelos import construir_paquete
+from versiones_modelos import publicar_version
+from motor_numpy import exportar_modelo, exportar_modelo_keras
+from datos_entrenamiento import (DatosEntrenamiento, MedidorRendimiento, tasa_aprendizaje,
+                                 TASA_APRENDIZAJE_BASE, PASOS_POR_EJECUCION)
+from predictor_panes import NOMBRE_MULTISALIDA, cargar_predictor
+from manifiesto_modelos import (cargar_manifiesto, guardar_manifiesto, entrada_modelo, estado_modelo,
+                                VIGENTE, AMPLIABLE, OBSOLETO)
 
 PANES = [
     "Pan_Canilla_Cantidad",
@@ -21,126 +38,458 @@ PANES = [
     "Pan_De_Arequipe_Cantidad"
 ]
 
-# Cargar y preparar los datos
-df = pd.read_csv("pankira.csv")
-cols = ["Dia_De_La_Semana", "Clima"] + PANES
-df = df[cols]
-data = pd.DataFrame(df.to_numpy(), columns=cols)
-
-for pan in PANES:
-    data[pan] = pd.to_numeric(data[pan], errors='coerce')
-
-# Codificar Dia_De_La_Semana y Clima
-le_dia = LabelEncoder()
-data['Dia_enc'] = le_dia.fit_transform(data['Dia_De_La_Semana'])
-
-# Codificar Clima
-le_clima = LabelEncoder()
-data['Clima_enc'] = le_clima.fit_transform(data['Clima'])
-
-# Asegurarse de que la carpeta 'models' exista
-os.makedirs("models", exist_ok=True)
-joblib.dump(le_dia, "models/label_encoder_dia.pkl")
-joblib.dump(list(le_dia.classes_), "models/dias_semana.pkl")
-joblib.dump(le_clima, "models/label_encoder_clima.pkl")
-joblib.dump(list(le_clima.classes_), "models/climas.pkl")
-
-# Preparar los datos para el entrenamiento
-X_features = data[['Dia_enc', 'Clima_enc']].values
-
-X_train_base, X_test_base, y_train_base, y_test_base = train_test_split(
-    X_features, data[PANES], test_size=0.2, random_state=42
-)
-
-# Bucle de entrenamiento principal
-total = len(PANES)
-for idx, pan in enumerate(PANES):
-    y_train = y_train_base[pan].values.reshape(-1, 1)
-    y_test = y_test_base[pan].values.reshape(-1, 1)
-
-    scaler_X = StandardScaler()
-    X_train_scaled = scaler_X.fit_transform(X_train_base)
-    X_test_scaled = scaler_X.transform(X_test_base)
-
-    scaler_y = StandardScaler()
-    y_train_scaled = scaler_y.fit_transform(y_train)
-    y_test_scaled = scaler_y.transform(y_test)
-
-    # Hemos reducido el Dropout y el factor de L2.
-    # Hemos aumentado las neuronas de 8 a 16 para darle más capacidad de aprendizaje.
+# Hiperparámetros de los modelos por pan. Forman parte de la huella de cada
+# modelo en el manifiesto: si cambian, el modelo se vuelve a entrenar.
+HIPERPARAMETROS = {
+    "neuronas": [16, 8], # Hemos aumentado las neuronas de 8 a 16 para darle más capacidad de aprendizaje.
+    "dropout": 0.2, # Dropout reducido al 20%
+    "l2": 0.0001, # Hemos reducido el factor de L2.
+    "epocas": 150, # Aumentamos por si necesita más tiempo para converger
+    "batch_size": 8, # Con historiales grandes conviene más (--batch-size); la tasa de aprendizaje se ajusta sola
+    "paciencia": 15, # Un poco más de paciencia
+    "test_size": 0.2,
+    "random_state": 42,
+}
+
+# El tronco compartido tiene más neuronas porque debe servir a las siete salidas
+HIPERPARAMETROS_MULTISALIDA = {**HIPERPARAMETROS, "neuronas": [32, 16]}
+
+# Épocas al continuar desde pesos guardados cuando solo se añadieron filas nuevas
+EPOCAS_AMPLIACION = 30
+
+
+def construir_modelo(n_salidas=1, hiperparametros=HIPERPARAMETROS):
+    """Crea y compila (con la tasa de aprendizaje base) la red densa usada para predecir la demanda."""
+    neuronas = hiperparametros["neuronas"]
+    factor_l2 = hiperparametros["l2"]
     model = keras.Sequential([
         keras.layers.Input(shape=(2,)),
-        keras.layers.Dense(16, activation='relu', kernel_regularizer=l2(0.0001)), # Más neuronas, menos regularización L2
-        Dropout(0.2), # Dropout reducido al 20%
-        keras.layers.Dense(8, activation='relu', kernel_regularizer=l2(0.0001)), # Capa intermedia (antes 4), L2 reducida
-        keras.layers.Dense(1)
+        keras.layers.Dense(neuronas[0], activation='relu', kernel_regularizer=l2(factor_l2)), # Más neuronas, menos regularización L2
+        Dropout(hiperparametros["dropout"]),
+        keras.layers.Dense(neuronas[1], activation='relu', kernel_regularizer=l2(factor_l2)), # Capa intermedia (antes 4), L2 reducida
+        keras.layers.Dense(n_salidas)
     ])
 
-    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    compilar(model)
+    return model
+
+
+def compilar(model, tasa=TASA_APRENDIZAJE_BASE):
+    """Compila el modelo con Adam y la tasa (o el calendario de tasas) indicada."""
+    model.compile(optimizer=keras.optimizers.Adam(tasa), loss='mse', metrics=['mae'],
+                  steps_per_execution=PASOS_POR_EJECUCION)
+
+
+def entrenar(model, datos, panes, scaler_X, scaler_y, hiperparametros=HIPERPARAMETROS, epocas=None):
+    """
+    Entrena el modelo con las columnas 'panes' de 'datos' (un DatosEntrenamiento)
+    y devuelve el historial de entrenamiento y las muestras por segundo.
+    """
+    epocas = epocas or hiperparametros["epocas"]
+    # La tasa depende del tamaño de lote y de las épocas de esta ejecución; al
+    # ampliar un modelo guardado se empieza también con un optimizador nuevo
+    compilar(model, tasa_aprendizaje(datos.batch_size, datos.pasos_por_epoca, epocas))
 
     # Añadimos EarlyStopping para evitar sobreentrenamiento
     # y permitir un entrenamiento más largo si es necesario.
     early_stopping = EarlyStopping(
         monitor='val_loss',
-        patience=15, # Un poco más de paciencia
+        patience=hiperparametros["paciencia"],
         verbose=1
     )
+    medidor = MedidorRendimiento(datos.filas)
 
-    history = model.fit(X_train_scaled, y_train_scaled,
-                          epochs=150, # Aumentamos por si necesita más tiempo para converger
-                          batch_size=8,
-                          verbose=0,
-                          validation_data=(X_test_scaled, y_test_scaled),
-                          callbacks=[early_stopping]
-                         )
+    history = model.fit(datos.entrenamiento(panes, scaler_X, scaler_y),
+                        epochs=epocas,
+                        steps_per_epoch=datos.pasos_por_epoca,
+                        shuffle=False, # El dataset ya baraja cada época
+                        verbose=0,
+                        validation_data=datos.validacion(panes, scaler_X, scaler_y),
+                        callbacks=[early_stopping, medidor]
+                       )
+    return history, medidor.muestras_por_segundo
 
-    loss, mae = model.evaluate(X_test_scaled, y_test_scaled, verbose=0)
-    print(f"\nModelo para {pan}: Loss (MSE) en prueba = {loss:.4f}, MAE en prueba = {mae:.4f}")
 
-    plt.figure(figsize=(12, 6))
-    
+def _dibujar_historial(fig, historial, nombre):
+    """Dibuja las curvas de pérdida y MAE (historial = history.history) en la figura."""
     # Gráfica de Pérdida (MSE)
-    plt.subplot(1, 2, 1)
-    plt.plot(history.history['loss'], label='Pérdida de Entrenamiento')
-    plt.plot(history.history['val_loss'], label='Pérdida de Validación')
-    plt.title(f'Curva de Pérdida (MSE) para {pan}')
-    plt.xlabel('Época')
-    plt.ylabel('Pérdida (MSE)')
-    plt.legend()
-    plt.grid(True)
-    
+    ax = fig.add_subplot(1, 2, 1)
+    ax.plot(historial['loss'], label='Pérdida de Entrenamiento')
+    ax.plot(historial['val_loss'], label='Pérdida de Validación')
+    ax.set_title(f'Curva de Pérdida (MSE) para {nombre}')
+    ax.set_xlabel('Época')
+    ax.set_ylabel('Pérdida (MSE)')
+    ax.legend()
+    ax.grid(True)
+
     # Gráfica de Error Absoluto Medio (MAE)
-    plt.subplot(1, 2, 2)
-    plt.plot(history.history['mae'], label='MAE de Entrenamiento')
-    plt.plot(history.history['val_mae'], label='MAE de Validación')
-    plt.title(f'Curva de MAE para {pan}')
-    plt.xlabel('Época')
-    plt.ylabel('Error Absoluto Medio (MAE)')
-    plt.legend()
-    plt.grid(True)
+    ax = fig.add_subplot(1, 2, 2)
+    ax.plot(historial['mae'], label='MAE de Entrenamiento')
+    ax.plot(historial['val_mae'], label='MAE de Validación')
+    ax.set_title(f'Curva de MAE para {nombre}')
+    ax.set_xlabel('Época')
+    ax.set_ylabel('Error Absoluto Medio (MAE)')
+    ax.legend()
+    ax.grid(True)
 
     # Ajustar el layout para que no se solapen los títulos
-    plt.tight_layout() # Ajusta el layout para que no se solapen los títulos
+    fig.tight_layout()
+
+
+def graficar_historial(historial, nombre):
+    """Muestra las curvas de entrenamiento en una ventana (bloquea hasta cerrarla)."""
+    fig = plt.figure(figsize=(12, 6))
+    _dibujar_historial(fig, historial, nombre)
     plt.show() # Muestra la gráfica en una ventana
 
-    # Guardar el modelo y los scalers
+
+class GraficadorEnSegundoPlano:
+    """
+    Guarda las curvas de entrenamiento como PNG en un hilo aparte, para que el
+    dibujo nunca retrase el siguiente entrenamiento. Usa Figure directamente
+    (sin pyplot), que sí puede usarse fuera del hilo principal.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        os.makedirs(carpeta, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pendientes = []
+
+    def __call__(self, historial, nombre):
+        self._pendientes.append(self._executor.submit(self._guardar, historial, nombre))
+
+    def _guardar(self, historial, nombre):
+        fig = Figure(figsize=(12, 6))
+        _dibujar_historial(fig, historial, nombre)
+        fig.savefig(os.path.join(self.carpeta, f"curvas_{nombre.replace(' ', '_')}.png"))
+
+    def cerrar(self):
+        """Espera a que se escriban todas las gráficas pendientes."""
+        self._executor.shutdown(wait=True)
+        for futuro in self._pendientes:
+            futuro.result()
+
+
+def entrenar_un_pan(pan, datos, ampliar=False, scaler_X=None, hiperparametros=HIPERPARAMETROS):
+    """
+    Entrena y guarda el modelo de un pan con los datos compartidos 'datos'. Devuelve
+    un diccionario con las métricas y el historial, de modo que pueda ejecutarse en
+    otro proceso. Con ampliar=True continúa desde el modelo y los scalers guardados.
+    'scaler_X' es el scaler de entrada ya ajustado (es el mismo para todos los panes).
+    """
+    if ampliar:
+        # Se conservan los scalers guardados para que las entradas signifiquen lo mismo que antes
+        scaler_X = joblib.load(f"models/scaler_X_{pan}.pkl")
+        scaler_y = joblib.load(f"models/scaler_y_{pan}.pkl")
+        model = keras.models.load_model(f"models/modelo_{pan}.keras")
+        epocas = EPOCAS_AMPLIACION
+    else:
+        if scaler_X is None:
+            scaler_X = StandardScaler().fit(datos.X_train)
+        scaler_y = StandardScaler().fit(datos.Y_train[:, [datos.panes.index(pan)]])
+        model = construir_modelo(hiperparametros=hiperparametros)
+        epocas = None
+
+    history, muestras_por_segundo = entrenar(model, datos, [pan], scaler_X, scaler_y,
+                                             hiperparametros=hiperparametros, epocas=epocas)
+
+    loss, mae = model.evaluate(datos.validacion([pan], scaler_X, scaler_y), verbose=0)
+
+    # Guardar el modelo y los scalers (necesarios para continuar el entrenamiento)
     model.save(f"models/modelo_{pan}.keras")
     joblib.dump(scaler_X, f"models/scaler_X_{pan}.pkl")
     joblib.dump(scaler_y, f"models/scaler_y_{pan}.pkl")
+    # Las apps usan copias con los scalers incorporados: reciben códigos y devuelven unidades
+    exportar_modelo(model, f"models/modelo_{pan}.npz", scaler_X, scaler_y)
+    exportar_modelo_keras(model, f"models/modelo_{pan}_unidades.keras", scaler_X, scaler_y)
+
+    return {"pan": pan, "loss": float(loss), "mae": float(mae), "historial": history.history,
+            "muestras_por_segundo": muestras_por_segundo}
+
+
+def _limitar_hilos_tensorflow(hilos):
+    """Inicializador de cada proceso: limita los hilos que usa TensorFlow."""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(hilos)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _resultados_en_paralelo(jobs, panes, ampliar, scaler_X, datos, hiperparametros):
+    """
+    Entrena cada pan en su propio proceso y entrega los resultados según terminan.
+    Cada proceso recibe los arreglos de 'datos' y crea sus propios tensores.
+    """
+    hilos = max(1, (os.cpu_count() or 1) // jobs)
+    # 'spawn' porque TensorFlow no es seguro tras un fork
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=contexto,
+                             initializer=_limitar_hilos_tensorflow, initargs=(hilos,)) as executor:
+        futuros = [
+            executor.submit(entrenar_un_pan, pan, datos, pan in ampliar, scaler_X, hiperparametros)
+            for pan in panes
+        ]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def entrenar_por_pan(X_train_base, X_test_base, y_train_base, y_test_base, jobs=1, graficar=graficar_historial,
+                     panes=PANES, ampliar=(), hiperparametros=HIPERPARAMETROS):
+    """
+    Entrena un modelo por cada pan de 'panes' (modo por defecto); los panes que
+    estén en 'ampliar' continúan desde sus pesos guardados y el resto de PANES se
+    reutiliza tal cual. Con jobs > 1 cada modelo se entrena en un proceso distinto.
+    Devuelve el predictor y las métricas de los panes entrenados.
+    """
+    # Las entradas son las mismas para todos los panes: el scaler de entrada se ajusta
+    # una sola vez y los datos se preparan una vez para todos los modelos
+    scaler_X = StandardScaler().fit(X_train_base)
+    datos = DatosEntrenamiento(X_train_base, y_train_base[PANES].values, X_test_base, y_test_base[PANES].values,
+                               PANES, hiperparametros["batch_size"])
+    if jobs > 1 and len(panes) > 1:
+        resultados = _resultados_en_paralelo(jobs, panes, ampliar, scaler_X, datos, hiperparametros)
+    else:
+        resultados = (entrenar_un_pan(pan, datos, pan in ampliar, scaler_X, hiperparametros) for pan in panes)
+
+    total = len(panes)
+    metricas = {}
+    for idx, resultado in enumerate(resultados):
+        pan = resultado["pan"]
+        print(f"\nModelo para {pan}: Loss (MSE) en prueba = {resultado['loss']:.4f}, MAE en prueba = {resultado['mae']:.4f}, "
+              f"{resultado['muestras_por_segundo']:,.0f} muestras/s")
+
+        graficar(resultado["historial"], pan)
+        metricas[pan] = {"mse": resultado["loss"], "mae": resultado["mae"], "epocas": len(resultado["historial"]["loss"]),
+                         "muestras_por_segundo": resultado["muestras_por_segundo"]}
+
+        # Mostrar progreso de entrenamiento
+        percent = int(((idx + 1) / total) * 100)
+        sys.stdout.write(f"\rEntrenando modelos: [{'#' * percent}{'.' * (100 - percent)}] {percent}%")
+        sys.stdout.flush()
+
+    # Un modelo de salida múltiple anterior tendría prioridad al cargar, así que se elimina
+    for ruta in [f"models/{NOMBRE_MULTISALIDA}.pkl", f"models/modelo_{NOMBRE_MULTISALIDA}.keras",
+                 f"models/modelo_{NOMBRE_MULTISALIDA}.npz", f"models/modelo_{NOMBRE_MULTISALIDA}_unidades.keras"]:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    # Los modelos recién exportados se cargan con el motor NumPy para construir la tabla
+    return cargar_predictor(PANES), metricas
+
+
+def entrenar_multisalida(X_train_base, X_test_base, y_train_base, y_test_base, graficar=graficar_historial,
+                         ampliar=False, hiperparametros=HIPERPARAMETROS_MULTISALIDA):
+    """
+    Entrena un único modelo con una salida por pan (con ampliar=True continúa desde
+    el modelo guardado). Devuelve el predictor y las métricas por pan.
+    """
+    y_train = y_train_base[PANES].values
+    y_test = y_test_base[PANES].values
+    datos = DatosEntrenamiento(X_train_base, y_train, X_test_base, y_test, PANES, hiperparametros["batch_size"])
+
+    if ampliar:
+        meta = joblib.load(f"models/{NOMBRE_MULTISALIDA}.pkl")
+        scaler_X, scaler_y = meta["scaler_X"], meta["scaler_y"]
+        model = keras.models.load_model(f"models/modelo_{NOMBRE_MULTISALIDA}.keras")
+        epocas = EPOCAS_AMPLIACION
+    else:
+        scaler_X = StandardScaler().fit(X_train_base)
+        scaler_y = StandardScaler().fit(y_train)
+        model = construir_modelo(n_salidas=len(PANES), hiperparametros=hiperparametros)
+        epocas = None
+
+    history, muestras_por_segundo = entrenar(model, datos, PANES, scaler_X, scaler_y,
+                                             hiperparametros=hiperparametros, epocas=epocas)
+
+    loss, mae = model.evaluate(datos.validacion(PANES, scaler_X, scaler_y), verbose=0)
+    print(f"\nModelo de salida múltiple: Loss (MSE) en prueba = {loss:.4f}, MAE en prueba = {mae:.4f}, "
+          f"{muestras_por_segundo:,.0f} muestras/s")
+
+    graficar(history.history, "todos los panes")
+
+    # Métricas de cada salida (en la escala normalizada, igual que en el modo por pan)
+    error = model.predict(scaler_X.transform(X_test_base), verbose=0) - scaler_y.transform(y_test)
+    epocas = len(history.history["loss"])
+    metricas = {
+        pan: {"mse": float((error[:, k] ** 2).mean()), "mae": float(abs(error[:, k]).mean()), "epocas": epocas,
+              "muestras_por_segundo": muestras_por_segundo}
+        for k, pan in enumerate(PANES)
+    }
+
+    # Guardar el modelo y, en un solo archivo, los scalers y el orden de las salidas
+    model.save(f"models/modelo_{NOMBRE_MULTISALIDA}.keras")
+    joblib.dump({"panes": PANES, "scaler_X": scaler_X, "scaler_y": scaler_y}, f"models/{NOMBRE_MULTISALIDA}.pkl")
+    exportar_modelo(model, f"models/modelo_{NOMBRE_MULTISALIDA}.npz", scaler_X, scaler_y, PANES)
+    exportar_modelo_keras(model, f"models/modelo_{NOMBRE_MULTISALIDA}_unidades.keras", scaler_X, scaler_y)
+
+    return cargar_predictor(PANES), metricas
+
+
+def guardar_resumen(metricas, modo, ruta):
+    """Escribe en JSON el MSE/MAE de prueba de cada modelo."""
+    resumen = {"fecha": datetime.now().isoformat(timespec="seconds"), "modo": modo, "modelos": metricas}
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+
+
+def artefactos_completos(nombre):
+    """Indica si están en disco todos los archivos de un modelo (un pan o el de salida múltiple)."""
+    if nombre == NOMBRE_MULTISALIDA:
+        rutas = [f"models/{NOMBRE_MULTISALIDA}.pkl"]
+    else:
+        rutas = [f"models/scaler_X_{nombre}.pkl", f"models/scaler_y_{nombre}.pkl"]
+    rutas += [f"models/modelo_{nombre}.keras", f"models/modelo_{nombre}.npz"]
+    return all(os.path.exists(ruta) for ruta in rutas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena y guarda los modelos de demanda de pan.")
+    parser.add_argument("--multisalida", action="store_true",
+                        help="Entrena un solo modelo con una salida por pan en lugar de un modelo por pan.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Número de procesos para entrenar los modelos por pan en paralelo (por defecto 1).")
+    parser.add_argument("--headless", action="store_true",
+                        help="No abre ventanas: las gráficas se guardan como PNG en segundo plano.")
+    parser.add_argument("--dir-graficas", default="graficas",
+                        help="Carpeta donde se guardan las gráficas en modo --headless (por defecto 'graficas').")
+    parser.add_argument("--resumen", default="models/resumen_entrenamiento.json",
+                        help="Archivo JSON con las métricas de prueba de cada modelo.")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reentrena todos los modelos aunque su huella en el manifiesto siga vigente.")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Si solo se añadieron filas nuevas, continúa desde los pesos .keras guardados.")
+    parser.add_argument("--batch-size", type=int,
+                        help="Filas por lote (por defecto el de HIPERPARAMETROS). Con lotes mayores la tasa de "
+                             "aprendizaje se escala y sigue un calendario con calentamiento; cambiarlo reentrena los modelos.")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs debe ser al menos 1")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size debe ser al menos 1")
+
+    if args.headless:
+        # Backend sin ventanas: el script puede ejecutarse en un servidor o desde cron
+        plt.switch_backend("Agg")
+        graficar = GraficadorEnSegundoPlano(args.dir_graficas)
+    else:
+        graficar = graficar_historial
+
+    # Cargar y preparar los datos (del almacén de ventas si existe; si no, de pankira.csv)
+    df, errores = cargar_historial(columnas=PANES)
+    if errores:
+        print(resumen_errores(errores))
+    cols = ["Dia_De_La_Semana", "Clima"] + PANES
+    data = df[cols].copy()
+
+    # Codificar Dia_De_La_Semana y Clima
+    le_dia = LabelEncoder()
+    data['Dia_enc'] = le_dia.fit_transform(data['Dia_De_La_Semana'])
+
+    # Codificar Clima
+    le_clima = LabelEncoder()
+    data['Clima_enc'] = le_clima.fit_transform(data['Clima'])
+
+    # Asegurarse de que la carpeta 'models' exista
+    os.makedirs("models", exist_ok=True)
+    manifiesto = cargar_manifiesto()
+
+    # Los encoders solo se reescriben si cambiaron las clases o falta algún archivo
+    clases = {"dias": list(le_dia.classes_), "climas": list(le_clima.classes_)}
+    clases_sin_cambios = manifiesto.get("clases") == clases
+    rutas_encoders = ["models/label_encoder_dia.pkl", "models/dias_semana.pkl",
+                      "models/label_encoder_clima.pkl", "models/climas.pkl", RUTA_INDICE_CATEGORIAS]
+    if not clases_sin_cambios or not all(os.path.exists(ruta) for ruta in rutas_encoders):
+        joblib.dump(le_dia, "models/label_encoder_dia.pkl")
+        joblib.dump(list(le_dia.classes_), "models/dias_semana.pkl")
+        joblib.dump(le_clima, "models/label_encoder_clima.pkl")
+        joblib.dump(list(le_clima.classes_), "models/climas.pkl")
+        # Índice valor -> código para que las apps codifiquen sin LabelEncoder
+        guardar_indice(le_dia.classes_, le_clima.classes_)
+        manifiesto["clases"] = clases
+
+    # Preparar los datos para el entrenamiento
+    X_features = data[['Dia_enc', 'Clima_enc']].values
+
+    X_train_base, X_test_base, y_train_base, y_test_base = train_test_split(
+        X_features, data[PANES], test_size=HIPERPARAMETROS["test_size"], random_state=HIPERPARAMETROS["random_state"]
+    )
+
+    # Decidir qué modelos hay que entrenar comparando sus huellas con el manifiesto
+    if args.multisalida:
+        columnas_modelo = {NOMBRE_MULTISALIDA: cols}
+        hiperparametros = HIPERPARAMETROS_MULTISALIDA
+    else:
+        columnas_modelo = {pan: ["Dia_De_La_Semana", "Clima", pan] for pan in PANES}
+        hiperparametros = HIPERPARAMETROS
+    if args.batch_size is not None:
+        hiperparametros = {**hiperparametros, "batch_size": args.batch_size}
+
+    estados = {}
+    for nombre, columnas in columnas_modelo.items():
+        if args.forzar or not artefactos_completos(nombre):
+            estados[nombre] = OBSOLETO
+        else:
+            estados[nombre] = estado_modelo(manifiesto["modelos"].get(nombre), df, columnas,
+                                            hiperparametros, clases_sin_cambios)
+        if estados[nombre] == AMPLIABLE and not args.warm_start:
+            estados[nombre] = OBSOLETO
+        print(f"{nombre}: {estados[nombre]}")
+
+    # Entrenamiento principal
+    if args.multisalida:
+        if estados[NOMBRE_MULTISALIDA] == VIGENTE:
+            predictor = cargar_predictor(PANES)
+            metricas_nuevas = {}
+        else:
+            predictor, metricas = entrenar_multisalida(X_train_base, X_test_base, y_train_base, y_test_base,
+                                                       graficar=graficar,
+                                                       ampliar=estados[NOMBRE_MULTISALIDA] == AMPLIABLE,
+                                                       hiperparametros=hiperparametros)
+            metricas_nuevas = {NOMBRE_MULTISALIDA: metricas}
+    else:
+        panes_a_entrenar = [pan for pan in PANES if estados[pan] != VIGENTE]
+        predictor, metricas_nuevas = entrenar_por_pan(X_train_base, X_test_base, y_train_base, y_test_base,
+                                                      jobs=args.jobs, graficar=graficar, panes=panes_a_entrenar,
+                                                      ampliar={pan for pan in PANES if estados[pan] == AMPLIABLE},
+                                                      hiperparametros=hiperparametros)
+        # El modelo de salida múltiple se eliminó al entrenar por pan
+        manifiesto["modelos"].pop(NOMBRE_MULTISALIDA, None)
+
+    if metricas_nuevas:
+        print("\nEntrenamiento completado.")
+    else:
+        print("\nTodos los modelos están al día; no fue necesario reentrenar.")
+
+    # Registrar en el manifiesto los modelos recién entrenados
+    for nombre, metricas_modelo in metricas_nuevas.items():
+        manifiesto["modelos"][nombre] = entrada_modelo(df, columnas_modelo[nombre], hiperparametros, metricas_modelo)
+    guardar_manifiesto(manifiesto)
+
+    if args.multisalida:
+        metricas = manifiesto["modelos"][NOMBRE_MULTISALIDA]["metricas"]
+    else:
+        metricas = {pan: manifiesto["modelos"][pan]["metricas"] for pan in PANES}
+
+    guardar_resumen(metricas, "multisalida" if args.multisalida else "por_pan", args.resumen)
+    print(f"Resumen de métricas guardado en '{args.resumen}'.")
+    if args.headless:
+        graficar.cerrar()
+        print(f"Gráficas guardadas en '{args.dir_graficas}'.")
 
-    # Mostrar progreso de entrenamiento
-    percent = int(((idx + 1) / total) * 100)
-    sys.stdout.write(f"\rEntrenando modelos: [{'#' * percent}{'.' * (100 - percent)}] {percent}%")
-    sys.stdout.flush()
+    # Precalcular todas las combinaciones (día, clima, pan) para que la app solo consulte la tabla
+    tabla = construir_tabla(predictor, le_dia.classes_, le_clima.classes_, PANES)
+    guardar_tabla(tabla, le_dia.classes_, le_clima.classes_, PANES)
+    print(f"Tabla de predicciones guardada ({tabla.shape[0]} días x {tabla.shape[1]} climas x {tabla.shape[2]} panes).")
 
-print("\nEntrenamiento completado.")
+    # Actualizar los promedios de ventas para el sistema de ofertas con los datos ya cargados
+    print("\nActualizando análisis de ventas para sistema de ofertas...")
+    actualizar_promedios(df, PANES)
+    print(f"Promedios de ventas guardados en '{RUTA_PROMEDIOS}'.")
 
-# Ejecutar el script de análisis para actualizar los promedios de ventas
-print("\nActualizando análisis de ventas para sistema de ofertas...")
+    # Reunir en un solo archivo todo lo que usan las apps (índice, tabla, modelos y promedios)
+    ruta_paquete = construir_paquete(PANES)
+    print(f"Paquete de modelos guardado en '{ruta_paquete}'.")
 
-try:
-    # Se utiliza subprocess para llamar al nuevo script de forma segura
-    subprocess.run([sys.executable, 'analisis_ofertas.py'], check=True)
-except (subprocess.CalledProcessError, FileNotFoundError) as e:
-    print(f"\nError al ejecutar 'analisis_ofertas.py': {e}")
-    print("Por favor, ejecuta el script manualmente para generar los datos de promedios.")
\ No newline at end of file
+    # Publicar el paquete como versión nueva; las apps abiertas la recargan solas
+    version = publicar_version(ruta_paquete)
+    print(f"Versión '{version}' publicada como vigente en 'models/actual'.")
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from datos_ventas import PANES, DIAS, numero_dia_semana
+
+# Efectos calibrados con pankira.csv (ajuste log-lineal por grupo de panes):
+# ventas = base del pan x efecto del día x efecto del clima x ruido log-normal.
+# Los panes salados y los dulces reaccionan distinto al día y al clima.
+BASE = {
+    "Pan_Canilla_Cantidad": 90.2,
+    "Pan_Frances_Cantidad": 91.9,
+    "Pan_Colombiano_Cantidad": 88.7,
+    "Pan_Sobao_Cantidad": 93.0,
+    "Pan_Dulce_Cantidad": 28.7,
+    "Pan_De_Coco_Cantidad": 29.7,
+    "Pan_De_Arequipe_Cantidad": 28.0,
+}
+PANES_DULCES = ["Pan_Dulce_Cantidad", "Pan_De_Coco_Cantidad", "Pan_De_Arequipe_Cantidad"]
+
+# Efecto de cada día en el orden de DIAS (Lunes ... Domingo)
+EFECTO_DIA = {
+    "salado": [1.00, 1.04, 1.06, 1.03, 1.34, 1.29, 1.31],
+    "dulce": [1.00, 0.86, 0.88, 0.94, 1.33, 1.36, 1.25],
+}
+
+# Climas, su frecuencia en el año simulado y su efecto sobre las ventas
+CLIMAS = ["soleado", "soleado_nublado", "lluvioso", "nublado", "nublado_lluvioso",
+          "soleado_nublado_lluvioso", "soleado_lluvioso"]
+FRECUENCIA_CLIMA = [85, 74, 62, 50, 39, 33, 22]
+EFECTO_CLIMA = {
+    "salado": [1.00, 0.98, 1.09, 1.14, 1.01, 0.65, 0.79],
+    "dulce": [1.00, 0.90, 1.01, 1.17, 1.02, 0.68, 0.97],
+}
+
+# Desviación del logaritmo de las ventas que no explican el día ni el clima
+RUIDO = {"salado": 0.115, "dulce": 0.17}
+
+# Las sucursales venden más o menos que la panadería original según su tamaño
+DISPERSION_SUCURSALES = 0.25
+
+FILAS_POR_BLOQUE = 1_000_000
+
+# Última fecha que acepta datos_ventas (años de cuatro cifras)
+FECHA_MAXIMA = np.datetime64("9999-12-31")
+
+
+def ultima_fecha(filas, sucursales=1, inicio="2025-01-01"):
+    """Fecha de la última fila generada: cada fecha tiene una fila por sucursal."""
+    return np.datetime64(inicio, "D") + np.timedelta64(-(-filas // sucursales) - 1, "D")
+
+
+def generar_bloques(filas, sucursales=1, semilla=42, ruido=1.0, inicio="2025-01-01",
+                    filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Genera 'filas' filas de ventas con el esquema de pankira.csv, en
+    DataFrames de como máximo 'filas_por_bloque' filas, así la memoria no
+    depende del total. Cada fecha tiene una fila por sucursal (todas con el
+    mismo clima); con más de una sucursal se añade la columna 'Sucursal'.
+    'ruido' multiplica la variabilidad calibrada (0 = sin ruido). Con la misma
+    semilla y el mismo tamaño de bloque se obtienen los mismos datos. Si la
+    última fecha pasaría de FECHA_MAXIMA se lanza ValueError.
+    """
+    if ultima_fecha(filas, sucursales, inicio) > FECHA_MAXIMA:
+        raise ValueError(f"{filas} filas con {sucursales} sucursal(es) desde {inicio} pasan de {FECHA_MAXIMA}; "
+                         f"usa más sucursales, menos filas o una fecha de inicio anterior.")
+    semillas = np.random.SeedSequence(semilla)
+    rng = np.random.default_rng(semillas.spawn(1)[0])
+    tamano_sucursal = np.exp(rng.normal(0.0, DISPERSION_SUCURSALES, sucursales)) if sucursales > 1 else np.ones(1)
+
+    grupo = ["dulce" if pan in PANES_DULCES else "salado" for pan in PANES]
+    base = np.array([BASE[pan] for pan in PANES])
+    efecto_dia = np.column_stack([EFECTO_DIA[g] for g in grupo])      # (7 días, panes)
+    efecto_clima = np.column_stack([EFECTO_CLIMA[g] for g in grupo])  # (climas, panes)
+    sigma = np.array([RUIDO[g] for g in grupo]) * ruido
+    probabilidad_clima = np.array(FRECUENCIA_CLIMA) / sum(FRECUENCIA_CLIMA)
+
+    inicio = np.datetime64(inicio, "D")
+    dia_inicio = int(numero_dia_semana(inicio))
+    limite = np.iinfo(np.uint16).max
+    # Los bloques contienen días completos (todas las sucursales de cada fecha)
+    dias_por_bloque = max(1, filas_por_bloque // sucursales)
+    total_dias = -(-filas // sucursales)
+
+    for primer_dia in range(0, total_dias, dias_por_bloque):
+        rng = np.random.default_rng(semillas.spawn(1)[0])
+        n_dias = min(dias_por_bloque, total_dias - primer_dia)
+        desplazamiento = np.arange(primer_dia, primer_dia + n_dias)
+        clima_dia = rng.choice(len(CLIMAS), size=n_dias, p=probabilidad_clima)
+
+        # Una fila por (fecha, sucursal), recortada al total pedido
+        n = min(n_dias * sucursales, filas - primer_dia * sucursales)
+        desplazamiento = np.repeat(desplazamiento, sucursales)[:n]
+        clima = np.repeat(clima_dia, sucursales)[:n]
+        sucursal = np.tile(np.arange(sucursales), n_dias)[:n]
+        dia = (desplazamiento + dia_inicio) % 7
+
+        media = base * tamano_sucursal[sucursal, None] * efecto_dia[dia] * efecto_clima[clima]
+        ventas = np.rint(media * np.exp(rng.normal(0.0, 1.0, media.shape) * sigma))
+        ventas = np.clip(ventas, 0, limite).astype(np.uint16)
+
+        bloque = pd.DataFrame({
+            "Fecha": inicio + desplazamiento.astype("m8[D]"),
+            "Dia_De_La_Semana": pd.Categorical.from_codes(dia, categories=DIAS),
+            **{pan: ventas[:, k] for k, pan in enumerate(PANES)},
+            "Clima": pd.Categorical.from_codes(clima, categories=CLIMAS),
+        })
+        if sucursales > 1:
+            bloque["Sucursal"] = sucursal.astype(np.uint16) + 1
+        yield bloque
+
+
+def escribir_csv(ruta, filas, **opciones):
+    """Escribe el dataset en un CSV bloque a bloque. Devuelve el número de filas escritas."""
+    escritas = 0
+    for numero, bloque in enumerate(generar_bloques(filas, **opciones)):
+        bloque.to_csv(ruta, mode="w" if numero == 0 else "a", header=numero == 0, index=False,
+                      date_format="%Y-%m-%d")
+        escritas += len(bloque)
+    return escritas
+
+
+def escribir_almacen(carpeta, filas, **opciones):
+    """
+    Añade el dataset a un almacén de ventas (ver almacen_ventas) bloque a bloque.
+    El almacén guarda una fila por fecha, así que solo admite una sucursal.
+    """
+    from almacen_ventas import AlmacenVentas
+
+    if opciones.get("sucursales", 1) > 1:
+        raise ValueError("El almacén de ventas guarda una fila por fecha: no admite varias sucursales.")
+    almacen = AlmacenVentas(carpeta)
+    escritas = 0
+    for bloque in generar_bloques(filas, **opciones):
+        almacen.agregar(bloque, importacion=True)
+        escritas += len(bloque)
+    return escritas
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Genera ventas simuladas con el esquema de pankira.csv.")
+    parser.add_argument("--filas", type=int, default=365, help="Número total de filas (por defecto 365, un año).")
+    parser.add_argument("--sucursales", type=int, default=1, help="Sucursales por fecha (por defecto 1).")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla aleatoria (por defecto 42).")
+    parser.add_argument("--ruido", type=float, default=1.0,
+                        help="Factor sobre la variabilidad calibrada con pankira.csv (por defecto 1.0).")
+    parser.add_argument("--inicio", default="2025-01-01", help="Primera fecha (AAAA-MM-DD).")
+    parser.add_argument("--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE,
+                        help=f"Filas generadas en memoria a la vez (por defecto {FILAS_POR_BLOQUE}).")
+    salidas = parser.add_mutually_exclusive_group()
+    salidas.add_argument("--salida", default="ventas_simuladas.csv",
+                         help="CSV de salida (por defecto 'ventas_simuladas.csv').")
+    salidas.add_argument("--almacen", help="Carpeta de un almacén de ventas donde añadir las filas en lugar del CSV.")
+    args = parser.parse_args()
+    if args.filas < 1 or args.sucursales < 1 or args.filas_por_bloque < 1:
+        parser.error("--filas, --sucursales y --filas-por-bloque deben ser al menos 1")
+    if args.almacen and args.sucursales > 1:
+        parser.error("--almacen guarda una fila por fecha: no se puede usar con --sucursales")
+    if ultima_fecha(args.filas, args.sucursales, args.inicio) > FECHA_MAXIMA:
+        parser.error(f"las fechas pasarían de {FECHA_MAXIMA} (cada fecha tiene una fila por sucursal): "
+                     f"usa más --sucursales, menos --filas o un --inicio anterior")
+
+    opciones = {"sucursales": args.sucursales, "semilla": args.semilla, "ruido": args.ruido,
+                "inicio": args.inicio, "filas_por_bloque": args.filas_por_bloque}
+    inicio = time.perf_counter()
+    if args.almacen:
+        escritas = escribir_almacen(args.almacen, args.filas, **opciones)
+        destino = args.almacen
+    else:
+        escritas = escribir_csv(args.salida, args.filas, **opciones)
+        destino = args.salida
+    segundos = time.perf_counter() - inicio
+    print(f"{escritas} filas generadas en '{destino}' en {segundos:.1f} s ({escritas / segundos:,.0f} filas/s).")
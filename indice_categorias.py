@@ -0,0 +1,81 @@
+import os
+import joblib
+import numpy as np
+
+# Índice valor -> código de Dia_De_La_Semana y Clima, generado junto con los encoders
+RUTA_INDICE_CATEGORIAS = "models/indice_categorias.pkl"
+
+
+class IndiceCategorias:
+    """
+    Códigos de día y clima precalculados en diccionarios. Los códigos son la
+    posición de cada valor en los classes_ de los LabelEncoder, así que coinciden
+    con los usados al entrenar, pero se obtienen sin pasar por sklearn.
+    """
+
+    def __init__(self, dias, climas):
+        # 'dias' y 'climas' en el orden de los classes_ de los LabelEncoder
+        self.dias = list(dias)
+        self.climas = list(climas)
+        self.codigo_dia = {dia: i for i, dia in enumerate(self.dias)}
+        self.codigo_clima = {clima: i for i, clima in enumerate(self.climas)}
+
+    def codificar(self, dia, clima):
+        """Matriz (1, 2) con los códigos Dia_enc y Clima_enc de un día y clima."""
+        try:
+            return np.array([[self.codigo_dia[dia], self.codigo_clima[clima]]])
+        except KeyError as e:
+            raise ValueError(f"Valor no visto en el entrenamiento: {e.args[0]}") from None
+
+    def codificar_dias(self, valores):
+        """Códigos de una columna completa de días."""
+        return _codificar_columna(self.codigo_dia, valores, "Dia_De_La_Semana")
+
+    def codificar_climas(self, valores):
+        """Códigos de una columna completa de climas."""
+        return _codificar_columna(self.codigo_clima, valores, "Clima")
+
+    def codificar_columnas(self, dias, climas):
+        """Matriz (n, 2) de códigos Dia_enc y Clima_enc para dos columnas completas."""
+        return np.column_stack([self.codificar_dias(dias), self.codificar_climas(climas)])
+
+
+def _codificar_columna(codigos, valores, nombre):
+    """
+    Codifica una columna completa: pd.factorize agrupa los valores con una tabla
+    hash, se buscan solo los valores distintos en el diccionario y se expanden
+    con el índice inverso. Si hay valores vacíos o desconocidos se informa cuáles son.
+    """
+    import pandas as pd  # Solo lo necesitan los caminos por lotes
+
+    inverso, unicos = pd.factorize(np.asarray(valores, dtype=object))
+    # factorize da -1 a los valores vacíos (None/NaN); indexar con -1 tomaría el último valor
+    vacios = np.flatnonzero(inverso < 0)
+    if len(vacios):
+        raise ValueError(f"Valores vacíos en '{nombre}' en las filas {vacios[:10].tolist()}"
+                         f"{' ...' if len(vacios) > 10 else ''} (posición desde 0).")
+    desconocidos = [valor for valor in unicos if valor not in codigos]
+    if desconocidos:
+        raise ValueError(f"Valores de '{nombre}' no vistos en el entrenamiento: {desconocidos}. "
+                         f"Valores válidos: {list(codigos)}")
+    return np.array([codigos[valor] for valor in unicos], dtype=np.int64)[inverso]
+
+
+def guardar_indice(dias, climas, ruta=RUTA_INDICE_CATEGORIAS):
+    """Guarda el índice de códigos (se llama al entrenar, junto con los encoders)."""
+    indice = IndiceCategorias(dias, climas)
+    joblib.dump({"dias": indice.codigo_dia, "climas": indice.codigo_clima}, ruta)
+
+
+def cargar_indice(carpeta="models"):
+    """
+    Carga el índice de códigos. Si todavía no se generó, se construye a partir
+    de 'dias_semana.pkl' y 'climas.pkl', que guardan los classes_ en orden.
+    """
+    ruta = os.path.join(carpeta, os.path.basename(RUTA_INDICE_CATEGORIAS))
+    if os.path.exists(ruta):
+        datos = joblib.load(ruta)
+        return IndiceCategorias(sorted(datos["dias"], key=datos["dias"].get),
+                                sorted(datos["climas"], key=datos["climas"].get))
+    return IndiceCategorias(joblib.load(os.path.join(carpeta, "dias_semana.pkl")),
+                            joblib.load(os.path.join(carpeta, "climas.pkl")))
@@ -1,7 +1,8 @@
-import joblib
-from tensorflow import keras
 import customtkinter as ctk
-import pandas as pd
+from registro_modelos import obtener_registro
+from reglas_ofertas import detectar_ofertas
+from medicion_tiempos import medir
+from ejecutor_prediccion import TareasPantalla
 
 # Definición de la paleta de colores para la aplicación
 COLOR_PALETTE = {
@@ -36,21 +37,13 @@ class OfertasApp:
         self.on_back = on_back
 
         try:
-            # Cargar modelos, scalers y encoders (similar a MainApp)
-            self.le_dia = joblib.load("models/label_encoder_dia.pkl")
-            self.DIAS_SEMANA = joblib.load("models/dias_semana.pkl")
-            orden_dias = ["Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
-            self.DIAS_SEMANA = [dia for dia in orden_dias if dia in self.DIAS_SEMANA]
-
-            self.le_clima = joblib.load("models/label_encoder_clima.pkl")
-            self.CLIMAS = joblib.load("models/climas.pkl")
-
-            self.modelos = {pan: keras.models.load_model(f"models/modelo_{pan}.keras") for pan in self.PANES}
-            self.scalers = {pan: joblib.load(f"models/scaler_X_{pan}.pkl") for pan in self.PANES}
-            self.scalers_y = {pan: joblib.load(f"models/scaler_y_{pan}.pkl") for pan in self.PANES}
+            # Encoders, tabla y modelos compartidos con MainApp (se cargan una sola vez por proceso)
+            self.registro = obtener_registro()
+            self.DIAS_SEMANA = self.registro.DIAS_SEMANA
+            self.CLIMAS = self.registro.CLIMAS
 
             # Cargar el nuevo archivo con los promedios de ventas
-            self.promedios_ventas = joblib.load("models/promedios_ventas.pkl")
+            self.promedios_ventas = self.registro.obtener_promedios()
 
         except FileNotFoundError as e:
             error_message = f"Error al cargar archivos: {e}. Asegúrate de ejecutar 'entrenar_y_guardar.py' primero."
@@ -159,7 +152,7 @@ class OfertasApp:
         self.combo_clima.set(self.CLIMAS[0])
 
         # Botón Analizar y Recomendar Ofertas
-        btn_analizar = ctk.CTkButton(
+        self.btn_analizar = ctk.CTkButton(
             controls_frame, 
             text="Analizar y Recomendar Ofertas",
             corner_radius=12, 
@@ -170,7 +163,7 @@ class OfertasApp:
             text_color=COLOR_PALETTE["text_light"],
             command=self.recomendar_ofertas
         )
-        btn_analizar.grid(row=3, column=0, columnspan=2, pady=(40, 30))
+        self.btn_analizar.grid(row=3, column=0, columnspan=2, pady=(40, 30))
 
         # Textbox de Resultados
         self.textbox_result = ctk.CTkTextbox(
@@ -187,47 +180,61 @@ class OfertasApp:
         )
         self.textbox_result.grid(row=4, column=0, columnspan=2, pady=(10, 20), sticky="nsew", padx=widget_padx)
 
+        # El análisis se calcula fuera del hilo de la interfaz
+        self.tareas = TareasPantalla(self.parent_frame)
+
 
     def recomendar_ofertas(self):
         """
         Calcula las predicciones para todos los panes, las compara con los promedios
-        y muestra las recomendaciones en el área de texto.
+        y muestra las recomendaciones en el área de texto. El cálculo se hace en
+        segundo plano; si se pide otro análisis antes de que termine, solo se
+        muestra el último.
         """
         dia = self.combo_dia.get()
         clima = self.combo_clima.get()
-        recomendaciones = []
-        
-        # UMBRAL: Si la venta predicha es menor al 85% del promedio, se recomienda una oferta.
-        UMBRAL_OFERTA = 0.85 
 
-        try:
-            dia_enc = self.le_dia.transform([dia])[0]
-            clima_enc = self.le_clima.transform([clima])[0]
-            X_input_raw = pd.DataFrame([[dia_enc, clima_enc]])
+        # Tras una recarga en caliente el registro del proceso ya es el de la versión nueva
+        self.registro = obtener_registro()
+        registro = self.registro
+
+        def calcular():
+            with medir("ofertas.total"):
+                promedios_ventas = registro.obtener_promedios()
 
-            for pan in self.PANES:
-                # 1. Predecir la demanda
-                X_input_scaled = self.scalers[pan].transform(X_input_raw.values)
-                pred_scaled = self.modelos[pan].predict(X_input_scaled, verbose=0)[0][0]
-                prediccion_actual = self.scalers_y[pan].inverse_transform([[pred_scaled]])[0][0]
-                prediccion_actual = int(prediccion_actual)
+                # 1. Predecir la demanda de todos los panes
+                with medir("ofertas.prediccion"):
+                    predicciones = registro.predecir_todos(dia, clima)
 
-                # 2. Obtener el promedio histórico
-                promedio_historico = int(self.promedios_ventas.get(pan, {}).get(dia, 0))
+                # 2 y 3. Comparar con el promedio histórico (ver reglas_ofertas.UMBRAL_OFERTA)
+                with medir("ofertas.reglas"):
+                    return promedios_ventas, detectar_ofertas(predicciones, promedios_ventas, dia, self.PANES)
 
+        self.btn_analizar.configure(text="Analizando...")
+        self.textbox_result.configure(state="normal")
+        self.textbox_result.delete("1.0", "end")
+        self.textbox_result.insert("1.0", f"Analizando el día {dia} con clima {clima}...")
+        self.textbox_result.configure(text_color=COLOR_PALETTE["loading_text"], state="disabled")
+        self.tareas.enviar(calcular, lambda resultado: self._mostrar_ofertas(dia, clima, *resultado),
+                           lambda mensaje: self._show_error_and_back(f"Error al analizar ofertas: {mensaje}"))
 
-                # 3. Comparar y decidir si se recomienda oferta
-                if promedio_historico > 0 and prediccion_actual < (promedio_historico * UMBRAL_OFERTA):
-                    nombre_pan = pan.replace('_Cantidad', '').replace('_', ' ')
-                    recomendacion = (
-                        f"OFERTA SUGERIDA para: {nombre_pan}\n"
-                        f"  - Predicción: {prediccion_actual} unidades\n"
-                        f"  - Promedio histórico para los {dia}: {promedio_historico} unidades\n"
-                        f"  - Motivo: La venta proyectada es significativamente más baja que el promedio.\n"
-                    )
-                    recomendaciones.append(recomendacion)
-            
-            # 4. Mostrar el resultado
+    def _mostrar_ofertas(self, dia, clima, promedios_ventas, ofertas):
+        """Muestra las recomendaciones (se llama en el hilo de la interfaz)."""
+        self.promedios_ventas = promedios_ventas
+        self._fin_analisis()
+        recomendaciones = []
+        for oferta in ofertas:
+            nombre_pan = oferta["pan"].replace('_Cantidad', '').replace('_', ' ')
+            recomendacion = (
+                f"OFERTA SUGERIDA para: {nombre_pan}\n"
+                f"  - Predicción: {oferta['prediccion']} unidades\n"
+                f"  - Promedio histórico para los {dia}: {oferta['promedio']} unidades\n"
+                f"  - Motivo: La venta proyectada es significativamente más baja que el promedio.\n"
+            )
+            recomendaciones.append(recomendacion)
+        
+        # 4. Mostrar el resultado
+        with medir("ofertas.interfaz"):
             self.textbox_result.configure(state="normal")
             self.textbox_result.delete("1.0", "end")
             if recomendaciones:
@@ -242,11 +249,13 @@ class OfertasApp:
                 self.textbox_result.configure(text_color=COLOR_PALETTE["text_dark"])
             self.textbox_result.configure(state="disabled")
 
-        except Exception as e:
-            self._show_error_and_back(f"Error al analizar ofertas: {e}")
+    def _fin_analisis(self):
+        self.btn_analizar.configure(text="Analizar y Recomendar Ofertas")
 
     def _show_error_and_back(self, message):
         """Muestra un mensaje de error y un botón para volver."""
+        # El menú no reutilizará esta pantalla; la construirá de nuevo en la próxima visita
+        self.inicializada = False
         for widget in self.parent_frame.winfo_children():
             widget.destroy()
         ctk.CTkLabel(
@@ -269,5 +278,9 @@ class OfertasApp:
 
     def _atras(self):
         """Maneja la acción de volver al menú principal."""
+        if hasattr(self, "tareas"):
+            # El análisis pendiente ya no interesa; la pantalla queda lista para otro
+            self.tareas.cancelar()
+            self._fin_analisis()
         if self.on_back:
             self.on_back()
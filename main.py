@@ -1,7 +1,7 @@
-import joblib
-from tensorflow import keras
 import customtkinter as ctk
-import pandas as pd 
+from registro_modelos import obtener_registro
+from medicion_tiempos import medir
+from ejecutor_prediccion import TareasPantalla
 
 # Definición de la paleta de colores para la aplicación
 
@@ -39,17 +39,10 @@ class MainApp:
         self.on_back = on_back
 
         try:
-            self.le_dia = joblib.load("models/label_encoder_dia.pkl")
-            self.DIAS_SEMANA = joblib.load("models/dias_semana.pkl")
-            orden_dias = ["Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
-            self.DIAS_SEMANA = [dia for dia in orden_dias if dia in self.DIAS_SEMANA]
-            
-            self.le_clima = joblib.load("models/label_encoder_clima.pkl")
-            self.CLIMAS = joblib.load("models/climas.pkl")
-            
-            self.modelos = {pan: keras.models.load_model(f"models/modelo_{pan}.keras") for pan in self.PANES}
-            self.scalers = {pan: joblib.load(f"models/scaler_X_{pan}.pkl") for pan in self.PANES}
-            self.scalers_y = {pan: joblib.load(f"models/scaler_y_{pan}.pkl") for pan in self.PANES}
+            # Encoders, tabla y modelos compartidos por todo el proceso (se cargan una sola vez)
+            self.registro = obtener_registro()
+            self.DIAS_SEMANA = self.registro.DIAS_SEMANA
+            self.CLIMAS = self.registro.CLIMAS
 
         except FileNotFoundError as e:
             error_message = f"Error al cargar modelos: {e}. Asegúrate de que los archivos estén en la carpeta 'models'."
@@ -175,7 +168,7 @@ class MainApp:
         self.combo_pan.set(self.PANES[0])
 
         # Botón de Calcular Predicción
-        btn = ctk.CTkButton(
+        self.btn_calcular = ctk.CTkButton(
             controls_frame, 
             text="Calcular Predicción", 
             corner_radius=12, 
@@ -186,7 +179,7 @@ class MainApp:
             text_color=COLOR_PALETTE["text_light"],
             command=self.predecir
         )
-        btn.grid(row=4, column=0, columnspan=2, pady=(40, 30)) 
+        self.btn_calcular.grid(row=4, column=0, columnspan=2, pady=(40, 30)) 
 
         # Etiqueta de Resultado
         self.label_result = ctk.CTkLabel(
@@ -202,8 +195,13 @@ class MainApp:
         controls_frame.grid_columnconfigure(0, weight=1)
         controls_frame.grid_columnconfigure(1, weight=1)
 
+        # Las predicciones se calculan fuera del hilo de la interfaz
+        self.tareas = TareasPantalla(self.parent_frame)
+
     def _show_error_and_back(self, message):
         """Muestra un mensaje de error y un botón para volver al menú principal."""
+        # El menú no reutilizará esta pantalla; la construirá de nuevo en la próxima visita
+        self.inicializada = False
         for widget in self.parent_frame.winfo_children():
             widget.destroy()
         
@@ -230,11 +228,19 @@ class MainApp:
 
     def _atras(self):
         """Maneja la acción de volver al menú principal."""
+        if hasattr(self, "tareas"):
+            # El resultado pendiente ya no interesa; la pantalla queda lista para otra consulta
+            self.tareas.cancelar()
+            self._fin_calculo()
         if self.on_back:
             self.on_back()
 
     def predecir(self):
-        """Calcula la predicción de demanda de pan según la selección del usuario."""
+        """
+        Calcula la predicción de demanda de pan según la selección del usuario.
+        El cálculo se hace en segundo plano; si se pulsa de nuevo antes de que
+        termine, solo se muestra el resultado de la última selección.
+        """
         dia = self.combo_dia.get()
         clima = self.combo_clima.get()
         pan = self.combo_pan.get()
@@ -243,19 +249,30 @@ class MainApp:
             self.label_result.configure(text_color=COLOR_PALETTE["error_text"], text="Error: Tipo de pan no válido seleccionado.")
             return
 
-        try:
-            dia_enc = self.le_dia.transform([dia])[0]
-            clima_enc = self.le_clima.transform([clima])[0]
-            
-            X_input_raw = pd.DataFrame([[dia_enc, clima_enc]], columns=['Dia_De_La_Semana_Encoded', 'Clima_Encoded'])
-            X_input_scaled = self.scalers[pan].transform(X_input_raw.values)
-            
-            pred_scaled = self.modelos[pan].predict(X_input_scaled, verbose=0)[0][0]
-            pred = self.scalers_y[pan].inverse_transform([[pred_scaled]])[0][0]
-            
+        # Tras una recarga en caliente el registro del proceso ya es el de la versión nueva
+        self.registro = obtener_registro()
+        registro = self.registro
+
+        def calcular():
+            with medir("predecir.total"):
+                return registro.predecir(dia, clima, pan)
+
+        self.btn_calcular.configure(text="Calculando...")
+        self.label_result.configure(text_color=COLOR_PALETTE["loading_text"], text="Calculando predicción...")
+        self.tareas.enviar(calcular, lambda pred: self._mostrar_prediccion(pan, pred), self._mostrar_error_prediccion)
+
+    def _mostrar_prediccion(self, pan, pred):
+        """Muestra el resultado (se llama en el hilo de la interfaz)."""
+        self._fin_calculo()
+        with medir("predecir.interfaz"):
             self.label_result.configure(
                 text_color=COLOR_PALETTE["success_text"], 
                 text=f"Demanda estimada de {pan.replace('_Cantidad','').replace('_',' ')}: {int(pred):.0f} unidades" 
             )
-        except Exception as e:
-            self.label_result.configure(text_color=COLOR_PALETTE["error_text"], text=f"Error al calcular predicción: {e}")
+
+    def _mostrar_error_prediccion(self, mensaje):
+        self._fin_calculo()
+        self.label_result.configure(text_color=COLOR_PALETTE["error_text"], text=f"Error al calcular predicción: {mensaje}")
+
+    def _fin_calculo(self):
+        self.btn_calcular.configure(text="Calcular Predicción")
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+# Manifiesto con las huellas de los datos y la configuración de cada modelo entrenado
+RUTA_MANIFIESTO = "models/manifiesto.json"
+
+# Estados posibles de un modelo respecto a los datos actuales
+VIGENTE = "vigente"      # Nada cambió: no hace falta reentrenar
+AMPLIABLE = "ampliable"  # Solo se añadieron filas: se puede continuar desde los pesos guardados
+OBSOLETO = "obsoleto"    # Hay que entrenar desde cero
+
+
+def huella_datos(df):
+    """Huella SHA-256 del contenido de un DataFrame (no depende del índice)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+
+def huella_modelo(df, columnas, hiperparametros):
+    """Huella de un modelo: datos de sus columnas, lista de columnas e hiperparámetros."""
+    contenido = json.dumps(
+        {"datos": huella_datos(df[columnas]), "columnas": columnas, "hiperparametros": hiperparametros},
+        sort_keys=True
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def entrada_modelo(df, columnas, hiperparametros, metricas):
+    """Crea la entrada del manifiesto para un modelo recién entrenado."""
+    return {
+        "huella": huella_modelo(df, columnas, hiperparametros),
+        "hash_datos": huella_datos(df[columnas]),
+        "filas": len(df),
+        "columnas": columnas,
+        "hiperparametros": hiperparametros,
+        "metricas": metricas,
+    }
+
+
+def estado_modelo(entrada, df, columnas, hiperparametros, clases_sin_cambios=True):
+    """
+    Compara la entrada guardada con los datos y la configuración actuales y
+    devuelve VIGENTE, AMPLIABLE u OBSOLETO.
+    """
+    if entrada is None:
+        return OBSOLETO
+    if entrada["huella"] == huella_modelo(df, columnas, hiperparametros):
+        return VIGENTE
+
+    # Solo se pueden reutilizar los pesos si las filas anteriores no cambiaron,
+    # la configuración es la misma y los códigos de día y clima siguen siendo válidos
+    filas = entrada.get("filas", 0)
+    if (clases_sin_cambios
+            and entrada["columnas"] == columnas
+            and entrada["hiperparametros"] == hiperparametros
+            and 0 < filas < len(df)
+            and huella_datos(df[columnas].iloc[:filas]) == entrada["hash_datos"]):
+        return AMPLIABLE
+    return OBSOLETO
+
+
+def cargar_manifiesto(ruta=RUTA_MANIFIESTO):
+    """Carga el manifiesto; si no existe devuelve uno vacío."""
+    if not os.path.exists(ruta):
+        return {"clases": {}, "modelos": {}}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_manifiesto(manifiesto, ruta=RUTA_MANIFIESTO):
+    """Guarda el manifiesto de forma atómica (primero en un temporal y luego se reemplaza)."""
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+
+# La medición está apagada salvo que se active con PANKIRA_TIEMPOS=1 o desde el panel de diagnóstico
+_activado = os.environ.get("PANKIRA_TIEMPOS") == "1"
+
+# Cuántas mediciones recientes se guardan por etapa
+CAPACIDAD = 1000
+
+_historiales = {}
+_candado = threading.Lock()
+_NULO = nullcontext()
+
+
+class _Medicion:
+    """Cronómetro de una etapa; al salir del bloque guarda la duración."""
+
+    __slots__ = ("etapa", "inicio")
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.etapa, time.perf_counter() - self.inicio)
+        return False
+
+
+def activado():
+    return _activado
+
+
+def activar():
+    global _activado
+    _activado = True
+
+
+def desactivar():
+    global _activado
+    _activado = False
+
+
+def medir(etapa):
+    """
+    Bloque 'with' que mide la duración de una etapa. Si la medición está
+    apagada devuelve un contexto vacío compartido, sin tomar tiempos.
+    """
+    if not _activado:
+        return _NULO
+    return _Medicion(etapa)
+
+
+def registrar(etapa, segundos):
+    """Agrega una duración (en segundos) al historial móvil de la etapa."""
+    with _candado:
+        historial = _historiales.get(etapa)
+        if historial is None:
+            historial = _historiales[etapa] = deque(maxlen=CAPACIDAD)
+        historial.append(segundos)
+
+
+def reiniciar():
+    """Borra todas las mediciones."""
+    with _candado:
+        _historiales.clear()
+
+
+def resumen():
+    """Diccionario etapa -> {n, p50_ms, p95_ms, max_ms} con las mediciones recientes."""
+    with _candado:
+        copias = {etapa: np.array(historial) * 1000 for etapa, historial in _historiales.items()}
+    return {
+        etapa: {
+            "n": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+        }
+        for etapa, ms in sorted(copias.items())
+    }
+
+
+def exportar(ruta):
+    """Guarda en JSON el resumen y las mediciones en bruto (en milisegundos)."""
+    with _candado:
+        mediciones = {etapa: [s * 1000 for s in historial] for etapa, historial in _historiales.items()}
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"resumen": resumen(), "mediciones_ms": mediciones}, f, ensure_ascii=False, indent=2)
@@ -1,5 +1,5 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import os
 import importlib.util
 import threading
@@ -18,7 +18,8 @@ COLOR_PALETTE = {
     "text_muted": "#050504",   # Gris verdoso suave para texto secundario (Dark Khaki)
     "border_light": "#D3D3D3", # Gris claro para bordes sutiles
     "error_text": "#DC143C",   # Rojo oscuro para mensajes de error (Crimson)
-    "loading_text": "#D13C01"  
+    "loading_text": "#D13C01",
+    "success_text": "#014D23"  # Verde para indicar que los modelos están listos
 }
 
 class MenuApp:
@@ -40,168 +41,324 @@ class MenuApp:
         self.main_frame = ctk.CTkFrame(self.root, fg_color=COLOR_PALETTE["bg_main"])
         self.main_frame.pack(fill="both", expand=True)
 
+        # Módulos de pantalla ya importados y pantallas ya construidas (se reutilizan al volver)
+        self.modulos = {}
+        self.pantallas = {}
+        self._candado_modulos = threading.Lock()
+        self._cargando = False
+        self.menu_frame = None
+        self._frame_temporal = None # Vista de carga o de error que se descarta al cambiar de vista
+
+        # Estado de la precarga de modelos: "cargando", "listo", "error" o "recarga_fallida"
+        self.estado_modelos = "cargando"
+        self.error_modelos = None
+        self.version_modelos = None
+        self.label_estado_modelos = None
+
+        # Panel oculto de diagnóstico (tiempos por etapa): se abre con Ctrl+Shift+D
+        self.ventana_diagnostico = None
+        self.root.bind("<Control-Shift-D>", lambda event: self.mostrar_diagnostico())
+
         self.mostrar_menu_principal()
+        self._precargar_modelos()
+
+    def _precargar_modelos(self):
+        """Carga modelos, escaladores y promedios en segundo plano apenas se muestra el menú."""
+        def precargar():
+            try:
+                import registro_modelos
+                registro = registro_modelos.precalentar()
+                try:
+                    registro.obtener_promedios()
+                except FileNotFoundError:
+                    pass # La pantalla de ofertas avisará si faltan los promedios
+                self.version_modelos = registro.version
+                self.main_frame.after(0, lambda: self._actualizar_estado_modelos("listo"))
+            except Exception as e:
+                mensaje = str(e) # 'e' deja de existir al salir del except
+                self.main_frame.after(0, lambda: self._actualizar_estado_modelos("error", mensaje))
+                return
+
+            # Cuando el entrenamiento publique una versión nueva se recarga sin reiniciar la app
+            registro_modelos.vigilar_versiones(
+                al_recargar=lambda version: self.main_frame.after(0, lambda: self._modelos_recargados(version)),
+                al_fallar=lambda version, error: self.main_frame.after(
+                    0, lambda: self._actualizar_estado_modelos("recarga_fallida", f"{version}: {error}"))
+            )
+
+        threading.Thread(target=precargar, daemon=True).start()
+
+    def _modelos_recargados(self, version):
+        """
+        Se llama tras una recarga en caliente. Las pantallas ocultas se descartan para
+        que se vuelvan a construir con los días y climas de la versión nueva; la que
+        está a la vista pasa a usar el registro nuevo en su siguiente cálculo.
+        """
+        self.version_modelos = version
+        for nombre, (contenedor, app) in list(self.pantallas.items()):
+            if not contenedor.winfo_ismapped():
+                del self.pantallas[nombre]
+                contenedor.destroy()
+        self._actualizar_estado_modelos("listo")
+
+    def _actualizar_estado_modelos(self, estado, error=None):
+        """Guarda el estado de la precarga y lo refleja en el menú si está visible."""
+        self.estado_modelos = estado
+        self.error_modelos = error
+        if self.label_estado_modelos is not None and self.label_estado_modelos.winfo_exists():
+            texto, color = self._texto_estado_modelos()
+            self.label_estado_modelos.configure(text=texto, text_color=color)
+
+    def _texto_estado_modelos(self):
+        """Texto y color de la etiqueta de estado de los modelos."""
+        if self.estado_modelos == "listo":
+            if self.version_modelos:
+                return f"Modelos listos (versión {self.version_modelos})", COLOR_PALETTE["success_text"]
+            return "Modelos listos", COLOR_PALETTE["success_text"]
+        if self.estado_modelos == "error":
+            return f"No se pudieron precargar los modelos: {self.error_modelos}", COLOR_PALETTE["error_text"]
+        if self.estado_modelos == "recarga_fallida":
+            return (f"No se pudo cargar la versión {self.error_modelos}. Se sigue usando la anterior.",
+                    COLOR_PALETTE["error_text"])
+        return "Cargando modelos en segundo plano...", COLOR_PALETTE["loading_text"]
+
+    def _esperar_modelos(self, con_promedios=False):
+        """
+        Espera (desde un hilo secundario, nunca desde el de Tk) a que el registro de
+        modelos esté cargado, para que la pantalla se construya sin bloquear la interfaz.
+        """
+        import registro_modelos
+        try:
+            registro = registro_modelos.obtener_registro()
+            if con_promedios:
+                registro.obtener_promedios()
+        except Exception:
+            pass # La pantalla mostrará el error al intentar usarlos
 
     def abrir_prediccion(self):
-        """Carga el módulo de predicción y muestra la interfaz."""
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-        
-        # Etiqueta de carga y barra de progreso mejoradas
-        loading_label = ctk.CTkLabel(
-            self.main_frame, 
-            text="Cargando Módulo de Predicción...", 
-            font=ctk.CTkFont(family="Roboto", size=22, weight="bold"), # Fuente limpia y legible
-            text_color=COLOR_PALETTE["loading_text"] 
-        )
-        loading_label.place(relx=0.5, rely=0.4, anchor="center")
-        
-        progress = ctk.CTkProgressBar(
-            self.main_frame, 
-            mode="indeterminate", 
-            width=300, 
-            height=12, 
-            corner_radius=6,
-            fg_color=COLOR_PALETTE["border_light"],      # Fondo de la barra de carga
-            progress_color=COLOR_PALETTE["primary_btn"]  # Color de la barra de carga
-        )
-        progress.place(relx=0.5, rely=0.5, anchor="center")
-        self.main_frame.after(0, progress.start)
+        """Muestra la interfaz de predicción (el módulo y la pantalla se crean una sola vez)."""
+        self._abrir_pantalla("prediccion", "main.py", "MainApp", "Cargando Módulo de Predicción...")
+
+    def analizar_ofertas(self):
+        """Muestra la interfaz de recomendación de ofertas (se crea una sola vez)."""
+        self._abrir_pantalla("ofertas", "interpretar_ofertas.py", "OfertasApp", "Cargando Módulo de Ofertas...",
+                             con_promedios=True)
+
+    def _abrir_pantalla(self, nombre, archivo, nombre_clase, texto_carga, con_promedios=False):
+        """
+        Muestra la pantalla 'nombre'. Si ya se construyó antes solo se vuelve a
+        mostrar; si no, se importa su módulo en un hilo secundario y se construye.
+        """
+        if self._cargando:
+            return # Evita que un doble clic lance dos hilos de carga
+
+        pantalla = self.pantallas.pop(nombre, None)
+        if pantalla is not None:
+            contenedor, app = pantalla
+            # Una pantalla que mostró un error se descarta y se vuelve a construir
+            if getattr(app, "inicializada", True) and contenedor.winfo_exists():
+                self.pantallas[nombre] = pantalla
+                self._mostrar_frame(contenedor)
+                return
+            contenedor.destroy()
+
+        self._cargando = True
+        progress = self._mostrar_carga(texto_carga)
 
-        def cargar_main():
-            """Carga el módulo main.py y muestra la interfaz de predicción."""
+        def cargar_modulo():
+            """Importa el módulo (solo la primera vez) y espera a que los modelos estén listos."""
             try:
-                spec = importlib.util.spec_from_file_location("main", os.path.join(os.path.dirname(__file__), "main.py"))
-                main_mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(main_mod)
-                if hasattr(main_mod, "MainApp"):
-                    self.main_frame.after(0, lambda: _finish_loading(main_mod.MainApp))
-                elif hasattr(main_mod, "main"):
-                    self.main_frame.after(0, lambda: _finish_loading(main_mod.main))
+                modulo = self._importar_modulo(archivo)
+                self._esperar_modelos(con_promedios)
+                if hasattr(modulo, nombre_clase):
+                    self.main_frame.after(0, lambda: _finish_loading(getattr(modulo, nombre_clase)))
                 else:
-                    self.main_frame.after(0, lambda: _finish_loading(None, "Error: main.py no tiene 'main' o 'MainApp'."))
+                    self.main_frame.after(0, lambda: _finish_loading(None, f"Error: '{archivo}' no contiene la clase '{nombre_clase}'."))
             except Exception as e:
-                self.main_frame.after(0, lambda: _finish_loading(None, f"Error al cargar main.py: {e}"))
+                mensaje = f"Error al cargar '{archivo}': {e}" # 'e' deja de existir al salir del except
+                self.main_frame.after(0, lambda: _finish_loading(None, mensaje))
 
-        def _finish_loading(main_func, error_message=None):
-            """Finaliza la carga del módulo y muestra el contenido."""
+        def _finish_loading(app_class, error_message=None):
+            """Finaliza la carga y construye la pantalla en su propio contenedor."""
             progress.stop()
-            for widget in self.main_frame.winfo_children():
-                widget.destroy()
-            
+            self._cargando = False
             if error_message:
-                ctk.CTkLabel(
-                    self.main_frame, 
-                    text=error_message,
-                    font=ctk.CTkFont(family="Roboto", size=18, weight="bold"), # Usar weight="bold"
-                    text_color=COLOR_PALETTE["error_text"],
-                    wraplength=self.root.winfo_width() * 0.7 # Ajusta para que el texto se envuelva
-                ).place(relx=0.5, rely=0.4, anchor="center")
-                
-                ctk.CTkButton(
-                    self.main_frame, 
-                    text="Volver al Menú", 
-                    command=self.mostrar_menu_principal,
-                    fg_color=COLOR_PALETTE["secondary_btn"], 
-                    hover_color=COLOR_PALETTE["primary_hover"],
-                    text_color=COLOR_PALETTE["text_light"], # Texto claro sobre botón oscuro
-                    font=ctk.CTkFont(family="Roboto", size=16, weight="normal"), 
-                    width=200, height=45, corner_radius=10
-                ).place(relx=0.5, rely=0.6, anchor="center")
-            elif main_func:
-                if isinstance(main_func, type):
-                    main_func(self.main_frame, on_back=self.mostrar_menu_principal)
-                else:
-                    main_func(self.main_frame)
-            else:
-                ctk.CTkLabel(
-                    self.main_frame, text="Error desconocido al cargar módulo.",
-                    text_color=COLOR_PALETTE["error_text"],
-                    font=ctk.CTkFont(family="Roboto", size=18, weight="bold") 
-                ).place(relx=0.5, rely=0.5, anchor="center")
+                self._mostrar_error(error_message)
+                return
 
-        threading.Thread(target=cargar_main).start()
+            contenedor = ctk.CTkFrame(self.main_frame, fg_color=COLOR_PALETTE["bg_main"])
+            self._mostrar_frame(contenedor)
+            app = app_class(contenedor, on_back=self.mostrar_menu_principal)
+            self.pantallas[nombre] = (contenedor, app)
 
-    def analizar_ofertas(self):
-        """Carga el módulo de recomendación de ofertas y muestra su interfaz."""
+        threading.Thread(target=cargar_modulo, daemon=True).start()
+
+    def _importar_modulo(self, archivo):
+        """Importa un módulo de pantalla una sola vez y lo reutiliza en las siguientes visitas."""
+        with self._candado_modulos:
+            if archivo not in self.modulos:
+                nombre_modulo = os.path.splitext(archivo)[0]
+                spec = importlib.util.spec_from_file_location(nombre_modulo, os.path.join(os.path.dirname(__file__), archivo))
+                modulo = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(modulo)
+                self.modulos[archivo] = modulo
+            return self.modulos[archivo]
+
+    def _mostrar_frame(self, frame):
+        """Oculta la vista actual y muestra 'frame', sin destruir las pantallas guardadas."""
+        if self._frame_temporal is not None and self._frame_temporal is not frame:
+            self._frame_temporal.destroy()
+            self._frame_temporal = None
         for widget in self.main_frame.winfo_children():
-            widget.destroy()
-        
+            if widget is not frame:
+                widget.pack_forget()
+        frame.pack(fill="both", expand=True)
+
+    def _mostrar_carga(self, texto):
+        """Muestra una vista temporal con la etiqueta de carga y devuelve su barra de progreso."""
+        frame = ctk.CTkFrame(self.main_frame, fg_color=COLOR_PALETTE["bg_main"])
+        self._mostrar_frame(frame)
+        self._frame_temporal = frame
+
+        # Etiqueta de carga y barra de progreso mejoradas
         loading_label = ctk.CTkLabel(
-            self.main_frame, text="Cargando Módulo de Ofertas...",
-            font=ctk.CTkFont(family="Roboto", size=22, weight="bold"), 
-            text_color=COLOR_PALETTE["loading_text"]
+            frame, 
+            text=texto, 
+            font=ctk.CTkFont(family="Roboto", size=22, weight="bold"), # Fuente limpia y legible
+            text_color=COLOR_PALETTE["loading_text"] 
         )
         loading_label.place(relx=0.5, rely=0.4, anchor="center")
         
         progress = ctk.CTkProgressBar(
-            self.main_frame, 
+            frame, 
             mode="indeterminate", 
             width=300, 
             height=12, 
             corner_radius=6,
-            fg_color=COLOR_PALETTE["border_light"],
-            progress_color=COLOR_PALETTE["primary_btn"]
+            fg_color=COLOR_PALETTE["border_light"],      # Fondo de la barra de carga
+            progress_color=COLOR_PALETTE["primary_btn"]  # Color de la barra de carga
         )
         progress.place(relx=0.5, rely=0.5, anchor="center")
-        progress.start()
+        frame.after(0, progress.start)
+        return progress
 
-        def cargar_modulo_ofertas():
-            """Carga el módulo interpretar_ofertas.py y muestra su interfaz."""
-            try:
-                spec = importlib.util.spec_from_file_location("interpretar_ofertas", os.path.join(os.path.dirname(__file__), "interpretar_ofertas.py"))
-                ofertas_mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(ofertas_mod)
-                
-                if hasattr(ofertas_mod, "OfertasApp"):
-                    self.main_frame.after(0, lambda: _finish_loading_ofertas(ofertas_mod.OfertasApp))
-                else:
-                    self.main_frame.after(0, lambda: _finish_loading_ofertas(None, "Error: 'interpretar_ofertas.py' no contiene la clase 'OfertasApp'."))
-            except Exception as e:
-                self.main_frame.after(0, lambda: _finish_loading_ofertas(None, f"Error al cargar 'interpretar_ofertas.py': {e}"))
+    def _mostrar_error(self, error_message):
+        """Muestra una vista temporal con el error y un botón para volver al menú."""
+        frame = ctk.CTkFrame(self.main_frame, fg_color=COLOR_PALETTE["bg_main"])
+        self._mostrar_frame(frame)
+        self._frame_temporal = frame
 
-        def _finish_loading_ofertas(app_class, error_message=None):
-            """Finaliza la carga del módulo de ofertas y muestra el contenido."""
-            progress.stop()
-            for widget in self.main_frame.winfo_children():
-                widget.destroy()
-            
-            if error_message:
-                ctk.CTkLabel(
-                    self.main_frame, 
-                    text=error_message, 
-                    text_color=COLOR_PALETTE["error_text"],
-                    font=ctk.CTkFont(family="Roboto", size=18, weight="bold"), # Usar weight="bold"
-                    wraplength=self.root.winfo_width() * 0.7
-                ).place(relx=0.5, rely=0.4, anchor="center")
-                ctk.CTkButton(
-                    self.main_frame, 
-                    text="Volver", 
-                    command=self.mostrar_menu_principal,
-                    fg_color=COLOR_PALETTE["secondary_btn"],
-                    hover_color=COLOR_PALETTE["primary_hover"],
-                    text_color=COLOR_PALETTE["text_light"],
-                    font=ctk.CTkFont(family="Roboto", size=16, weight="normal"), # Usar weight="normal"
-                    width=200, height=45, corner_radius=10
-                ).place(relx=0.5, rely=0.6, anchor="center")
-            elif app_class:
-                app_class(self.main_frame, on_back=self.mostrar_menu_principal)
-
-        threading.Thread(target=cargar_modulo_ofertas).start()
+        ctk.CTkLabel(
+            frame, 
+            text=error_message,
+            font=ctk.CTkFont(family="Roboto", size=18, weight="bold"), # Usar weight="bold"
+            text_color=COLOR_PALETTE["error_text"],
+            wraplength=self.root.winfo_width() * 0.7 # Ajusta para que el texto se envuelva
+        ).place(relx=0.5, rely=0.4, anchor="center")
+        
+        ctk.CTkButton(
+            frame, 
+            text="Volver al Menú", 
+            command=self.mostrar_menu_principal,
+            fg_color=COLOR_PALETTE["secondary_btn"], 
+            hover_color=COLOR_PALETTE["primary_hover"],
+            text_color=COLOR_PALETTE["text_light"], # Texto claro sobre botón oscuro
+            font=ctk.CTkFont(family="Roboto", size=16, weight="normal"), 
+            width=200, height=45, corner_radius=10
+        ).place(relx=0.5, rely=0.6, anchor="center")
     
+    def mostrar_diagnostico(self):
+        """
+        Abre el panel de diagnóstico con la latencia p50/p95 de cada etapa medida.
+        Al abrirlo se activa la medición; se puede apagar desde el mismo panel.
+        """
+        import medicion_tiempos
+        import registro_modelos
+
+        if self.ventana_diagnostico is not None and self.ventana_diagnostico.winfo_exists():
+            self.ventana_diagnostico.focus()
+            return
+
+        medicion_tiempos.activar()
+        ventana = ctk.CTkToplevel(self.root)
+        ventana.title("PanKira AI - Diagnóstico")
+        ventana.geometry("560x420")
+        ventana.configure(fg_color=COLOR_PALETTE["bg_main"])
+        self.ventana_diagnostico = ventana
+
+        texto = ctk.CTkTextbox(
+            ventana, font=ctk.CTkFont(family="Courier", size=13),
+            fg_color=COLOR_PALETTE["bg_panel"], text_color=COLOR_PALETTE["text_dark"],
+            border_color=COLOR_PALETTE["border_light"], border_width=1
+        )
+        texto.pack(fill="both", expand=True, padx=15, pady=(15, 10))
+
+        def actualizar():
+            if not ventana.winfo_exists():
+                return
+            lineas = [f"{'Etapa':<26}{'n':>6}{'p50 (ms)':>11}{'p95 (ms)':>11}", "-" * 54]
+            for etapa, datos in medicion_tiempos.resumen().items():
+                lineas.append(f"{etapa:<26}{datos['n']:>6}{datos['p50_ms']:>11.3f}{datos['p95_ms']:>11.3f}")
+            if len(lineas) == 2:
+                lineas.append("Sin mediciones todavía: use las pantallas de predicción u ofertas.")
+            registro = registro_modelos.registro_cargado()
+            cache = registro.estadisticas_modelos() if registro else None
+            if cache:
+                lineas += ["", f"Caché de modelos: {cache['en_memoria']} en memoria "
+                               f"(máximo {cache['capacidad']}, catálogo {cache['catalogo']})",
+                           f"aciertos {cache['aciertos']}, cargas {cache['cargas']}, desalojos {cache['desalojos']}, "
+                           f"{cache['segundos_carga'] * 1000:.1f} ms cargando"]
+            texto.configure(state="normal")
+            texto.delete("1.0", "end")
+            texto.insert("1.0", "\n".join(lineas))
+            texto.configure(state="disabled")
+            ventana.after(1000, actualizar) # Se refresca cada segundo mientras esté abierto
+
+        def cambiar_medicion():
+            if switch.get():
+                medicion_tiempos.activar()
+            else:
+                medicion_tiempos.desactivar()
+
+        def exportar():
+            ruta = filedialog.asksaveasfilename(parent=ventana, defaultextension=".json",
+                                                initialfile="tiempos_pankira.json",
+                                                filetypes=[("JSON", "*.json")])
+            if ruta:
+                medicion_tiempos.exportar(ruta)
+
+        botones = ctk.CTkFrame(ventana, fg_color="transparent")
+        botones.pack(pady=(0, 15))
+        switch = ctk.CTkSwitch(botones, text="Medición activa", command=cambiar_medicion,
+                               text_color=COLOR_PALETTE["text_dark"], progress_color=COLOR_PALETTE["primary_btn"])
+        switch.select()
+        switch.pack(side="left", padx=10)
+        for etiqueta, comando in (("Exportar", exportar), ("Reiniciar", medicion_tiempos.reiniciar)):
+            ctk.CTkButton(
+                botones, text=etiqueta, command=comando, width=110,
+                fg_color=COLOR_PALETTE["secondary_btn"], hover_color=COLOR_PALETTE["primary_hover"],
+                text_color=COLOR_PALETTE["text_light"]
+            ).pack(side="left", padx=10)
+
+        actualizar()
+
     def cerrar(self):
         """Cierra la aplicación."""
         self.root.destroy()
     
     def mostrar_menu_principal(self):
-        """Muestra el menú principal de la aplicación con un diseño renovado."""
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-            
+        """Muestra el menú principal (se construye la primera vez y después solo se vuelve a mostrar)."""
+        if self.menu_frame is None or not self.menu_frame.winfo_exists():
+            self.menu_frame = ctk.CTkFrame(self.main_frame, fg_color=COLOR_PALETTE["bg_main"])
+            self._construir_menu(self.menu_frame)
+        self._mostrar_frame(self.menu_frame)
+
+    def _construir_menu(self, contenedor):
+        """Construye el menú principal de la aplicación con un diseño renovado."""
         # Contenedor principal del menú, centrado y con esquinas redondeadas
         # Usamos bg_panel para que sea un blanco puro si bg_main es crema
         menu_card = ctk.CTkFrame(
-            self.main_frame, 
+            contenedor, 
             fg_color=COLOR_PALETTE["bg_panel"], 
             corner_radius=15, 
             width=500, # Ancho fijo para la "tarjeta" del menú
@@ -225,7 +382,17 @@ class MenuApp:
             font=ctk.CTkFont(family="Roboto", size=18, weight="normal"), 
             text_color=COLOR_PALETTE["text_muted"]
         )
-        subtitle_label.pack(pady=(0, 40))
+        subtitle_label.pack(pady=(0, 10))
+
+        # Estado de la precarga de modelos en segundo plano
+        texto_estado, color_estado = self._texto_estado_modelos()
+        self.label_estado_modelos = ctk.CTkLabel(
+            menu_card, text=texto_estado,
+            font=ctk.CTkFont(family="Roboto", size=14, weight="normal"),
+            text_color=color_estado,
+            wraplength=440
+        )
+        self.label_estado_modelos.pack(pady=(0, 20))
 
         button_font = ctk.CTkFont(family="Roboto", size=18, weight="bold")
         button_width = 280 # Botones más anchos
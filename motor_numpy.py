@@ -0,0 +1,172 @@
+import os
+import numpy as np
+
+# Si se define PANKIRA_USAR_KERAS=1 se cargan los modelos .keras en lugar de los pesos .npz
+USAR_KERAS = os.environ.get("PANKIRA_USAR_KERAS", "0") == "1"
+
+ACTIVACIONES = {
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+}
+
+
+def exportar_modelo(model, ruta, scaler_X=None, scaler_y=None, salidas=None):
+    """
+    Guarda los pesos y sesgos de las capas Dense de un modelo Keras en un .npz.
+    Las capas Dropout se omiten porque en inferencia no modifican la entrada.
+
+    Si se pasan los StandardScaler, se incorporan a los pesos: la primera capa
+    recibe los códigos sin escalar y la última devuelve unidades, de modo que
+    al predecir no hace falta cargar ni aplicar los scalers. 'salidas' guarda
+    el orden de las salidas (los panes del modelo de salida múltiple).
+    """
+    capas = []
+    for layer in model.layers:
+        if layer.__class__.__name__ != "Dense":
+            continue
+        kernel, bias = layer.get_weights()
+        capas.append([kernel.astype(np.float64), bias.astype(np.float64), layer.get_config()["activation"]])
+
+    extra = {}
+    if scaler_X is not None and scaler_y is not None:
+        capas = incorporar_scalers(capas, scaler_X, scaler_y)
+        extra["en_unidades"] = np.array(True)
+    if salidas is not None:
+        extra["salidas"] = np.array(salidas)
+
+    pesos = {}
+    for k, (W, b, _) in enumerate(capas):
+        pesos[f"W{k}"] = W.astype(np.float32)
+        pesos[f"b{k}"] = b.astype(np.float32)
+    np.savez(ruta, activaciones=np.array([a for _, _, a in capas]), **extra, **pesos)
+
+
+def incorporar_scalers(capas, scaler_X, scaler_y):
+    """
+    Devuelve las capas [(W, b, activacion), ...] con los StandardScaler incorporados:
+    la primera capa recibe las entradas sin escalar y la última devuelve unidades.
+    """
+    if capas[-1][2] != "linear":
+        raise ValueError("Solo se pueden incorporar los scalers si la última capa es lineal.")
+    capas = [[np.asarray(W, dtype=np.float64), np.asarray(b, dtype=np.float64), a] for W, b, a in capas]
+    # (x - media) / escala @ W + b  ==  x @ (W / escala) + (b - (media / escala) @ W)
+    W, b, _ = capas[0]
+    capas[0][0] = W / scaler_X.scale_[:, None]
+    capas[0][1] = b - (scaler_X.mean_ / scaler_X.scale_) @ W
+    # (h @ W + b) * escala + media  ==  h @ (W * escala) + (b * escala + media)
+    W, b, _ = capas[-1]
+    capas[-1][0] = W * scaler_y.scale_[None, :]
+    capas[-1][1] = b * scaler_y.scale_ + scaler_y.mean_
+    return capas
+
+
+def exportar_modelo_keras(model, ruta, scaler_X, scaler_y):
+    """
+    Guarda una copia del modelo Keras con la normalización de la entrada y la
+    desnormalización de la salida como capas, para usarla con PANKIRA_USAR_KERAS=1
+    sin los scalers. El modelo original (en escala normalizada) se conserva para
+    poder continuar su entrenamiento.
+    """
+    from tensorflow import keras
+
+    entrada = keras.Input(shape=(len(scaler_X.mean_),))
+    x = keras.layers.Normalization(mean=scaler_X.mean_, variance=scaler_X.scale_ ** 2)(entrada)
+    x = model(x, training=False)
+    salida = keras.layers.Normalization(mean=scaler_y.mean_, variance=scaler_y.scale_ ** 2, invert=True)(x)
+    keras.Model(entrada, salida).save(ruta)
+
+
+class RedDensaNumpy:
+    """Pase hacia adelante de una red Dense usando solo NumPy."""
+
+    def __init__(self, capas, en_unidades=False, salidas=None):
+        # capas: lista de tuplas (W, b, nombre_activacion)
+        for _, _, activacion in capas:
+            if activacion not in ACTIVACIONES:
+                raise ValueError(f"Activación no soportada por el motor NumPy: {activacion}")
+        self.capas = [(W, b, ACTIVACIONES[activacion]) for W, b, activacion in capas]
+        self.activaciones = [activacion for _, _, activacion in capas]
+        # en_unidades: los scalers ya están incorporados en los pesos
+        self.en_unidades = en_unidades
+        self.salidas = salidas
+
+    @classmethod
+    def desde_archivo(cls, ruta):
+        """Crea la red a partir de un archivo .npz generado por exportar_modelo."""
+        with np.load(ruta) as datos:
+            activaciones = [str(a) for a in datos["activaciones"]]
+            capas = [(datos[f"W{k}"], datos[f"b{k}"], a) for k, a in enumerate(activaciones)]
+            en_unidades = "en_unidades" in datos.files and bool(datos["en_unidades"])
+            salidas = [str(s) for s in datos["salidas"]] if "salidas" in datos.files else None
+        return cls(capas, en_unidades, salidas)
+
+    def predict(self, X, verbose=0):
+        """Misma firma que keras.Model.predict para poder usarla en su lugar."""
+        salida = np.asarray(X, dtype=np.float32)
+        for W, b, activacion in self.capas:
+            salida = activacion(salida @ W + b)
+        return salida
+
+
+class ModeloKerasRapido:
+    """
+    Envuelve un modelo Keras para predecir pocas filas sin model.predict, que
+    arma un adaptador de datos y un bucle de predicción en cada llamada. La
+    llamada al modelo se compila una sola vez con tf.function (con el número de
+    filas libre) y después recibe directamente arreglos NumPy.
+    """
+
+    def __init__(self, model, en_unidades=False):
+        import tensorflow as tf
+
+        self.model = model
+        self.en_unidades = en_unidades
+        n_entradas = model.inputs[0].shape[-1]
+        self._llamada = tf.function(
+            lambda X: model(X, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, n_entradas), dtype=tf.float32)],
+        )
+
+    def predict(self, X, verbose=0):
+        """Misma firma que keras.Model.predict para poder usarla en su lugar."""
+        return self._llamada(np.asarray(X, dtype=np.float32)).numpy()
+
+
+def cargar_modelo(pan, carpeta="models", usar_keras=USAR_KERAS):
+    """
+    Carga el modelo de un pan. Por defecto usa el motor NumPy; si no existe el .npz
+    (o se pide explícitamente) se recurre a Keras, con la llamada compilada de
+    ModeloKerasRapido en lugar de model.predict. En Keras se prefiere la copia con
+    los scalers como capas (modelo_<pan>_unidades.keras) si existe.
+    """
+    ruta_npz = os.path.join(carpeta, f"modelo_{pan}.npz")
+    if not usar_keras and os.path.exists(ruta_npz):
+        return RedDensaNumpy.desde_archivo(ruta_npz)
+
+    from tensorflow import keras
+    ruta_unidades = os.path.join(carpeta, f"modelo_{pan}_unidades.keras")
+    if os.path.exists(ruta_unidades):
+        return ModeloKerasRapido(keras.models.load_model(ruta_unidades), en_unidades=True)
+    return ModeloKerasRapido(keras.models.load_model(os.path.join(carpeta, f"modelo_{pan}.keras")))
+
+
+if __name__ == "__main__":
+    # Exporta a .npz los modelos .keras ya entrenados, sin reentrenar
+    import joblib
+    from tensorflow import keras
+    from datos_ventas import PANES
+
+    for pan in PANES:
+        model = keras.models.load_model(f"models/modelo_{pan}.keras")
+        scaler_X = joblib.load(f"models/scaler_X_{pan}.pkl")
+        scaler_y = joblib.load(f"models/scaler_y_{pan}.pkl")
+        exportar_modelo(model, f"models/modelo_{pan}.npz", scaler_X, scaler_y)
+        exportar_modelo_keras(model, f"models/modelo_{pan}_unidades.keras", scaler_X, scaler_y)
+        print(f"Pesos de {pan} exportados a 'models/modelo_{pan}.npz' (con los scalers incorporados).")
+
+    if os.path.exists("models/multisalida.pkl"):
+        meta = joblib.load("models/multisalida.pkl")
+        model = keras.models.load_model("models/modelo_multisalida.keras")
+        exportar_modelo(model, "models/modelo_multisalida.npz", meta["scaler_X"], meta["scaler_y"], meta["panes"])
+        exportar_modelo_keras(model, "models/modelo_multisalida_unidades.keras", meta["scaler_X"], meta["scaler_y"])
+        print("Pesos del modelo de salida múltiple exportados a 'models/modelo_multisalida.npz'.")
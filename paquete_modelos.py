@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+import joblib
+import numpy as np
+from indice_categorias import IndiceCategorias, cargar_indice
+from tabla_predicciones import TablaPredicciones, cargar_tabla
+from motor_numpy import RedDensaNumpy, incorporar_scalers
+from predictor_panes import (PredictorPorPan, PredictorMultisalida, CacheModelos, NOMBRE_MULTISALIDA,
+                             CAPACIDAD_CACHE_MODELOS, existe_multisalida)
+
+# Paquete con todos los artefactos que usan las apps en un solo archivo
+RUTA_PAQUETE = "models/modelos.paquete"
+
+# Formato: FIRMA, largo de la cabecera (uint64), cabecera JSON y, alineados a
+# ALINEACION bytes, los arreglos uno detrás de otro. La cabecera describe cada
+# arreglo (tipo, forma, posición) y guarda el SHA-256 de la zona de datos.
+FIRMA = b"PANKIRA\x00"
+VERSION_FORMATO = 1
+ALINEACION = 64
+
+# El SHA-256 se comprueba una vez al publicar cada versión (ver versiones_modelos).
+# Al abrir no se comprueba, porque leería todo el archivo y dejaría de ser perezoso;
+# con PANKIRA_VERIFICAR_PAQUETE=1 se comprueba también en cada apertura.
+VERIFICAR_AL_ABRIR = os.environ.get("PANKIRA_VERIFICAR_PAQUETE", "0") == "1"
+
+
+def _alinear(n):
+    return (n + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def escribir_paquete(ruta, arreglos, metadatos):
+    """
+    Escribe un paquete con los arreglos NumPy indicados (diccionario nombre ->
+    arreglo) y metadatos serializables en JSON. Se escribe primero en un
+    temporal y después se reemplaza el archivo, así nunca queda a medias.
+    """
+    arreglos = {nombre: np.ascontiguousarray(arreglo) for nombre, arreglo in arreglos.items()}
+    descriptores = {}
+    posicion = 0
+    for nombre, arreglo in arreglos.items():
+        descriptores[nombre] = {"tipo": arreglo.dtype.str, "forma": list(arreglo.shape),
+                                "inicio": posicion, "bytes": arreglo.nbytes}
+        posicion = _alinear(posicion + arreglo.nbytes)
+
+    datos = bytearray(posicion)
+    for nombre, arreglo in arreglos.items():
+        inicio = descriptores[nombre]["inicio"]
+        datos[inicio:inicio + arreglo.nbytes] = arreglo.tobytes()
+
+    cabecera = json.dumps({
+        "version": VERSION_FORMATO,
+        "sha256": hashlib.sha256(datos).hexdigest(),
+        "arreglos": descriptores,
+        "metadatos": metadatos,
+    }, ensure_ascii=False).encode("utf-8")
+    inicio_datos = _alinear(len(FIRMA) + 8 + len(cabecera))
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(FIRMA)
+        f.write(len(cabecera).to_bytes(8, "little"))
+        f.write(cabecera)
+        f.write(b"\x00" * (inicio_datos - len(FIRMA) - 8 - len(cabecera)))
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+class PaqueteModelos:
+    """
+    Lectura de un paquete. Solo se lee la cabecera; los datos se mapean en
+    memoria (np.memmap) y el sistema operativo los lee al usarlos. Varios
+    procesos que abren el mismo paquete comparten esas páginas. Con
+    verificar=True se comprueba el SHA-256 al abrir (lee todos los datos).
+    """
+
+    def __init__(self, ruta, verificar=VERIFICAR_AL_ABRIR):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            if f.read(len(FIRMA)) != FIRMA:
+                raise ValueError(f"'{ruta}' no es un paquete de modelos de PanKira.")
+            largo = int.from_bytes(f.read(8), "little")
+            cabecera = json.loads(f.read(largo).decode("utf-8"))
+        if cabecera["version"] != VERSION_FORMATO:
+            raise ValueError(f"Versión de paquete no soportada: {cabecera['version']} (se esperaba {VERSION_FORMATO}).")
+
+        self.version = cabecera["version"]
+        self.sha256 = cabecera["sha256"]
+        self.arreglos = cabecera["arreglos"]
+        self.metadatos = cabecera["metadatos"]
+        self._datos = np.memmap(ruta, dtype=np.uint8, mode="r", offset=_alinear(len(FIRMA) + 8 + largo))
+        if verificar:
+            self.verificar()
+
+    def verificar(self):
+        """Comprueba el SHA-256 de los datos; lanza ValueError si el paquete está dañado."""
+        if hashlib.sha256(self._datos).hexdigest() != self.sha256:
+            raise ValueError(f"El paquete '{self.ruta}' está dañado (el SHA-256 no coincide).")
+
+    def arreglo(self, nombre):
+        """Arreglo de solo lectura que apunta directamente al archivo mapeado."""
+        d = self.arreglos[nombre]
+        return np.ndarray(d["forma"], dtype=np.dtype(d["tipo"]), buffer=self._datos, offset=d["inicio"])
+
+    def indice(self):
+        """Índice de códigos de día y clima."""
+        return IndiceCategorias(self.metadatos["dias"], self.metadatos["climas"])
+
+    def tabla(self):
+        """Tabla precalculada de predicciones, o None si el paquete no la incluye."""
+        if "tabla" not in self.arreglos:
+            return None
+        indice = {"dias": self.metadatos["dias"], "climas": self.metadatos["climas"],
+                  "panes": self.metadatos["panes_tabla"]}
+        return TablaPredicciones(self.arreglo("tabla"), indice)
+
+    def _red(self, nombre):
+        info = self.metadatos["modelos"][nombre]
+        capas = [(self.arreglo(f"modelo/{nombre}/W{k}"), self.arreglo(f"modelo/{nombre}/b{k}"), activacion)
+                 for k, activacion in enumerate(info["activaciones"])]
+        return RedDensaNumpy(capas, en_unidades=True, salidas=info.get("salidas"))
+
+    def predictor(self, panes, capacidad=CAPACIDAD_CACHE_MODELOS):
+        """
+        Predictor con los modelos del paquete, o None si no cubren todos los panes.
+        Los modelos por pan se crean bajo demanda (ver CacheModelos).
+        """
+        modelos = self.metadatos["modelos"]
+        if NOMBRE_MULTISALIDA in modelos:
+            if all(pan in modelos[NOMBRE_MULTISALIDA]["salidas"] for pan in panes):
+                return PredictorMultisalida(self._red(NOMBRE_MULTISALIDA), None, None,
+                                            modelos[NOMBRE_MULTISALIDA]["salidas"])
+            return None
+        if not all(pan in modelos for pan in panes):
+            return None
+        return PredictorPorPan(CacheModelos(panes, self._red, capacidad))
+
+    def promedios(self):
+        """Promedios de ventas con el mismo formato que promedios_ventas.pkl, o None."""
+        if "promedios" not in self.arreglos:
+            return None
+        info = self.metadatos["promedios"]
+        valores = self.arreglo("promedios")
+        return {
+            pan: {dia: float(valores[i, j]) for j, dia in enumerate(info["dias"]) if not np.isnan(valores[i, j])}
+            for i, pan in enumerate(info["panes"])
+        }
+
+
+def construir_paquete(panes, carpeta="models", ruta=None):
+    """
+    Reúne en un paquete los artefactos que usan las apps: índice de día y clima,
+    tabla de predicciones, modelos .npz (con los scalers incorporados) y promedios.
+    """
+    indice = cargar_indice(carpeta)
+    arreglos = {}
+    metadatos = {"fecha": datetime.now().isoformat(timespec="seconds"),
+                 "dias": indice.dias, "climas": indice.climas, "modelos": {}}
+
+    tabla = cargar_tabla(os.path.join(carpeta, "tabla_predicciones.npy"),
+                         os.path.join(carpeta, "tabla_predicciones_indice.pkl"))
+    if tabla is not None:
+        arreglos["tabla"] = tabla.tabla
+        metadatos["panes_tabla"] = tabla.panes
+
+    nombres = [NOMBRE_MULTISALIDA] if existe_multisalida(carpeta) else panes
+    for nombre in nombres:
+        red = RedDensaNumpy.desde_archivo(os.path.join(carpeta, f"modelo_{nombre}.npz"))
+        capas = [(W, b, activacion) for (W, b, _), activacion in zip(red.capas, red.activaciones)]
+        salidas = red.salidas
+        if not red.en_unidades:
+            # Modelo exportado antes de incorporar los scalers: se incorporan aquí
+            if nombre == NOMBRE_MULTISALIDA:
+                meta = joblib.load(os.path.join(carpeta, f"{NOMBRE_MULTISALIDA}.pkl"))
+                scaler_X, scaler_y, salidas = meta["scaler_X"], meta["scaler_y"], meta["panes"]
+            else:
+                scaler_X = joblib.load(os.path.join(carpeta, f"scaler_X_{nombre}.pkl"))
+                scaler_y = joblib.load(os.path.join(carpeta, f"scaler_y_{nombre}.pkl"))
+            capas = incorporar_scalers(capas, scaler_X, scaler_y)
+        for k, (W, b, _) in enumerate(capas):
+            arreglos[f"modelo/{nombre}/W{k}"] = np.asarray(W, dtype=np.float32)
+            arreglos[f"modelo/{nombre}/b{k}"] = np.asarray(b, dtype=np.float32)
+        metadatos["modelos"][nombre] = {"activaciones": red.activaciones, "salidas": salidas}
+
+    ruta_promedios = os.path.join(carpeta, "promedios_ventas.pkl")
+    if os.path.exists(ruta_promedios):
+        promedios = joblib.load(ruta_promedios)
+        panes_promedios = list(promedios)
+        dias_promedios = sorted({dia for por_dia in promedios.values() for dia in por_dia})
+        valores = np.full((len(panes_promedios), len(dias_promedios)), np.nan)
+        for i, pan in enumerate(panes_promedios):
+            for j, dia in enumerate(dias_promedios):
+                if dia in promedios[pan]:
+                    valores[i, j] = promedios[pan][dia]
+        arreglos["promedios"] = valores
+        metadatos["promedios"] = {"panes": panes_promedios, "dias": dias_promedios}
+
+    ruta = ruta or os.path.join(carpeta, os.path.basename(RUTA_PAQUETE))
+    escribir_paquete(ruta, arreglos, metadatos)
+    return ruta
+
+
+def cargar_paquete(carpeta="models", verificar=VERIFICAR_AL_ABRIR):
+    """Abre el paquete de 'carpeta'. Devuelve None si todavía no se ha generado."""
+    ruta = os.path.join(carpeta, os.path.basename(RUTA_PAQUETE))
+    if not os.path.exists(ruta):
+        return None
+    return PaqueteModelos(ruta, verificar)
+
+
+if __name__ == "__main__":
+    # Genera el paquete a partir de los artefactos ya existentes, sin reentrenar, y lo publica
+    from datos_ventas import PANES
+    from versiones_modelos import publicar_version
+
+    ruta = construir_paquete(PANES)
+    paquete = PaqueteModelos(ruta, verificar=True)
+    print(f"Paquete de modelos guardado en '{ruta}' ({os.path.getsize(ruta)} bytes, "
+          f"{len(paquete.arreglos)} arreglos, SHA-256 {paquete.sha256[:12]}...).")
+    print(f"Versión '{publicar_version(ruta)}' publicada como vigente.")
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import joblib
+import numpy as np
+from motor_numpy import cargar_modelo
+from medicion_tiempos import medir
+
+# Artefacto del modelo de salida múltiple (un solo modelo para todos los panes)
+NOMBRE_MULTISALIDA = "multisalida"
+
+# Modelos por pan que se mantienen en memoria a la vez (el catálogo puede ser mayor)
+CAPACIDAD_CACHE_MODELOS = 32
+
+
+class ModeloEscalado:
+    """
+    Modelo exportado antes de incorporar los scalers, junto con sus scalers.
+    Recibe códigos y devuelve unidades, igual que un modelo con los scalers incorporados.
+    """
+
+    en_unidades = True
+
+    def __init__(self, modelo, scaler_X, scaler_y):
+        self.modelo = modelo
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+
+    def predict(self, X, verbose=0):
+        with medir("prediccion.escalado"):
+            X_scaled = self.scaler_X.transform(X)
+        pred_scaled = self.modelo.predict(X_scaled, verbose=0)
+        with medir("prediccion.desescalado"):
+            return self.scaler_y.inverse_transform(pred_scaled.reshape(-1, 1))
+
+
+class CacheModelos:
+    """
+    Modelos por pan cargados bajo demanda: la primera predicción de un pan carga
+    solo su modelo. Se guardan como máximo 'capacidad' modelos (None = sin
+    límite); al superarla se descarta el usado hace más tiempo (LRU).
+    Se usa como un diccionario pan -> modelo.
+    """
+
+    def __init__(self, panes, cargar, capacidad=None):
+        self.panes = list(panes)
+        self.capacidad = capacidad
+        self._cargar = cargar
+        self._modelos = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.cargas = 0
+        self.desalojos = 0
+        self.segundos_carga = 0.0
+
+    def __iter__(self):
+        return iter(self.panes)
+
+    def __len__(self):
+        return len(self.panes)
+
+    def __contains__(self, pan):
+        return pan in self.panes
+
+    def __getitem__(self, pan):
+        with self._candado:
+            modelo = self._modelos.get(pan)
+            if modelo is not None:
+                self._modelos.move_to_end(pan)
+                self.aciertos += 1
+                return modelo
+            if pan not in self.panes:
+                raise KeyError(pan)
+
+            # La carga se hace con el candado tomado para no cargar dos veces el mismo modelo
+            inicio = time.perf_counter()
+            with medir("carga.modelo_pan"):
+                modelo = self._cargar(pan)
+            self.segundos_carga += time.perf_counter() - inicio
+            self.cargas += 1
+            self._modelos[pan] = modelo
+            if self.capacidad is not None and len(self._modelos) > self.capacidad:
+                self._modelos.popitem(last=False)
+                self.desalojos += 1
+            return modelo
+
+    def estadisticas(self):
+        """Aciertos, cargas, desalojos y tiempo total de carga de la caché."""
+        with self._candado:
+            return {"en_memoria": len(self._modelos), "capacidad": self.capacidad, "catalogo": len(self.panes),
+                    "aciertos": self.aciertos, "cargas": self.cargas, "desalojos": self.desalojos,
+                    "segundos_carga": self.segundos_carga}
+
+
+class PredictorPorPan:
+    """
+    Un modelo por cada pan ('modelos' es un diccionario o una CacheModelos).
+    Cada modelo recibe códigos y devuelve unidades (ver ModeloEscalado).
+    """
+
+    def __init__(self, modelos):
+        self.modelos = modelos
+        self.panes = list(modelos)
+
+    def predecir(self, X, panes=None):
+        """
+        Recibe una matriz (n, 2) con Dia_enc y Clima_enc y devuelve un diccionario
+        pan -> arreglo de n predicciones en unidades.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        resultado = {}
+        for pan in panes or self.panes:
+            modelo = self.modelos[pan]
+            with medir("prediccion.modelo"):
+                resultado[pan] = modelo.predict(X, verbose=0)[:, 0]
+        return resultado
+
+    def estadisticas(self):
+        """Estadísticas de la caché de modelos, si se cargan bajo demanda."""
+        if isinstance(self.modelos, CacheModelos):
+            return self.modelos.estadisticas()
+        return None
+
+
+class PredictorMultisalida:
+    """
+    Un único modelo con una salida por pan; una sola pasada para todos.
+    Sin scalers si el modelo ya los incluye.
+    """
+
+    def __init__(self, modelo, scaler_X, scaler_y, panes):
+        self.modelo = modelo
+        self.scaler_X = scaler_X
+        self.scaler_y = scaler_y
+        self.panes = list(panes)
+        self._pos_pan = {pan: k for k, pan in enumerate(self.panes)}
+
+    def predecir(self, X, panes=None):
+        """Misma interfaz que PredictorPorPan.predecir."""
+        if self.scaler_X is None:
+            with medir("prediccion.modelo"):
+                pred = self.modelo.predict(np.asarray(X, dtype=np.float32), verbose=0)
+            return {pan: pred[:, self._pos_pan[pan]] for pan in panes or self.panes}
+
+        with medir("prediccion.escalado"):
+            X_scaled = self.scaler_X.transform(np.asarray(X))
+        with medir("prediccion.modelo"):
+            pred_scaled = self.modelo.predict(X_scaled, verbose=0)
+        with medir("prediccion.desescalado"):
+            pred = self.scaler_y.inverse_transform(pred_scaled)
+        return {pan: pred[:, self._pos_pan[pan]] for pan in panes or self.panes}
+
+
+def existe_multisalida(carpeta="models"):
+    """Indica si hay un modelo de salida múltiple guardado."""
+    return os.path.exists(os.path.join(carpeta, f"{NOMBRE_MULTISALIDA}.pkl"))
+
+
+def cargar_modelo_pan(pan, carpeta="models"):
+    """
+    Carga el modelo de un pan listo para recibir códigos y devolver unidades.
+    Si se exportó sin los scalers incorporados, se carga también su par de scalers.
+    """
+    modelo = cargar_modelo(pan, carpeta)
+    if getattr(modelo, "en_unidades", False):
+        return modelo
+    return ModeloEscalado(modelo, joblib.load(os.path.join(carpeta, f"scaler_X_{pan}.pkl")),
+                          joblib.load(os.path.join(carpeta, f"scaler_y_{pan}.pkl")))
+
+
+def cargar_predictor(panes, carpeta="models", capacidad=CAPACIDAD_CACHE_MODELOS):
+    """
+    Carga el predictor disponible en 'carpeta'. Si existe el modelo de salida
+    múltiple y cubre todos los panes se usa ese; si no, los modelos por pan,
+    que se cargan bajo demanda (ver CacheModelos).
+    """
+    if existe_multisalida(carpeta):
+        modelo = cargar_modelo(NOMBRE_MULTISALIDA, carpeta)
+        salidas = getattr(modelo, "salidas", None)
+        if getattr(modelo, "en_unidades", False) and salidas is not None:
+            if all(pan in salidas for pan in panes):
+                return PredictorMultisalida(modelo, None, None, salidas)
+        else:
+            meta = joblib.load(os.path.join(carpeta, f"{NOMBRE_MULTISALIDA}.pkl"))
+            if all(pan in meta["panes"] for pan in panes):
+                if getattr(modelo, "en_unidades", False):
+                    return PredictorMultisalida(modelo, None, None, meta["panes"])
+                return PredictorMultisalida(modelo, meta["scaler_X"], meta["scaler_y"], meta["panes"])
+
+    return PredictorPorPan(CacheModelos(panes, lambda pan: cargar_modelo_pan(pan, carpeta), capacidad))
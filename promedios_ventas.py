@@ -0,0 +1,191 @@
+import os
+import numpy as np
+
+# Estadísticas acumuladas de ventas (conteo, suma y suma de cuadrados) que usa la pantalla de ofertas
+RUTA_ESTADISTICAS = "models/estadisticas_ventas.npz"
+
+
+class PromediosVentas:
+    """
+    Estadísticas de ventas por (día, clima, pan): número de días, suma y suma de
+    cuadrados. Con ellas se obtienen la media y la desviación de cualquier
+    combinación, y un día nuevo se suma en O(1) sin volver a leer el historial.
+    """
+
+    def __init__(self, dias, climas, panes):
+        self.dias = list(dias)
+        self.climas = list(climas)
+        self.panes = list(panes)
+        self.codigo_dia = {dia: i for i, dia in enumerate(self.dias)}
+        self.codigo_clima = {clima: i for i, clima in enumerate(self.climas)}
+        self.codigo_pan = {pan: i for i, pan in enumerate(self.panes)}
+        self.conteo = np.zeros((len(self.dias), len(self.climas)), dtype=np.int64)
+        self.suma = np.zeros((len(self.dias), len(self.climas), len(self.panes)))
+        self.suma_cuadrados = np.zeros_like(self.suma)
+
+    @classmethod
+    def desde_ventas(cls, ventas, panes=None):
+        """Estadísticas de un DataFrame de ventas (ver datos_ventas.cargar_ventas)."""
+        from datos_ventas import DIAS, PANES  # Lee pandas; las apps solo cargan estadísticas ya guardadas
+
+        promedios = cls(DIAS, sorted(ventas["Clima"].dropna().unique()), panes or PANES)
+        promedios.agregar_ventas(ventas)
+        return promedios
+
+    def _clima(self, clima):
+        """Código de un clima; un clima nuevo se añade con sus estadísticas a cero."""
+        codigo = self.codigo_clima.get(clima)
+        if codigo is None:
+            codigo = self.codigo_clima[clima] = len(self.climas)
+            self.climas.append(clima)
+            self.conteo = np.pad(self.conteo, ((0, 0), (0, 1)))
+            self.suma = np.pad(self.suma, ((0, 0), (0, 1), (0, 0)))
+            self.suma_cuadrados = np.pad(self.suma_cuadrados, ((0, 0), (0, 1), (0, 0)))
+        return codigo
+
+    def _dia(self, dia):
+        try:
+            return self.codigo_dia[dia]
+        except KeyError:
+            raise ValueError(f"Día no válido: {dia}. Valores válidos: {self.dias}") from None
+
+    def agregar(self, dia, clima, cantidades):
+        """
+        Suma las ventas de un día. 'cantidades' es un diccionario pan -> unidades
+        (los panes que falten cuentan como 0) o una secuencia en el orden de 'panes'.
+        """
+        i, j = self._dia(dia), self._clima(clima)
+        if isinstance(cantidades, dict):
+            valores = np.zeros(len(self.panes))
+            for pan, cantidad in cantidades.items():
+                valores[self.codigo_pan[pan]] = cantidad
+        else:
+            valores = np.asarray(cantidades, dtype=np.float64)
+        self.conteo[i, j] += 1
+        self.suma[i, j] += valores
+        self.suma_cuadrados[i, j] += valores * valores
+
+    def agregar_ventas(self, ventas):
+        """
+        Suma un DataFrame de ventas completo en una sola pasada: cada fila se
+        convierte en una celda (día, clima) y np.bincount acumula las celdas.
+        """
+        import pandas as pd
+
+        for clima in ventas["Clima"].dropna().unique():
+            self._clima(clima)
+        dias = pd.Categorical(ventas["Dia_De_La_Semana"], categories=self.dias).codes
+        climas = pd.Categorical(ventas["Clima"], categories=self.climas).codes
+        if (dias < 0).any():
+            raise ValueError(f"Días no válidos en las ventas. Valores válidos: {self.dias}")
+        if (climas < 0).any():
+            raise ValueError(f"Climas vacíos en las ventas, en las filas {np.flatnonzero(climas < 0)[:10].tolist()}.")
+
+        celdas = self.conteo.size
+        celda = dias.astype(np.int64) * len(self.climas) + climas
+        self.conteo += np.bincount(celda, minlength=celdas).reshape(self.conteo.shape)
+        for k, pan in enumerate(self.panes):
+            valores = ventas[pan].to_numpy(dtype=np.float64)
+            self.suma[:, :, k] += np.bincount(celda, weights=valores, minlength=celdas).reshape(self.conteo.shape)
+            self.suma_cuadrados[:, :, k] += np.bincount(celda, weights=valores * valores,
+                                                        minlength=celdas).reshape(self.conteo.shape)
+
+    def _acumulados(self, dia, clima=None):
+        """Conteo, suma y suma de cuadrados de un día, de un clima concreto o de todos."""
+        i = self._dia(dia)
+        if clima is None:
+            return self.conteo[i].sum(), self.suma[i].sum(axis=0), self.suma_cuadrados[i].sum(axis=0)
+        j = self.codigo_clima.get(clima)
+        if j is None:
+            return 0, np.zeros(len(self.panes)), np.zeros(len(self.panes))
+        return self.conteo[i, j], self.suma[i, j], self.suma_cuadrados[i, j]
+
+    def estadisticas(self, pan, dia, clima=None):
+        """Diccionario {n, media, desviacion} (poblacional) de un pan para un día y, si se indica, un clima."""
+        n, suma, suma_cuadrados = self._acumulados(dia, clima)
+        k = self.codigo_pan[pan]
+        if n == 0:
+            return {"n": 0, "media": None, "desviacion": None}
+        media = suma[k] / n
+        varianza = max(suma_cuadrados[k] / n - media * media, 0.0)
+        return {"n": int(n), "media": float(media), "desviacion": float(np.sqrt(varianza))}
+
+    def promedios_por_dia(self):
+        """
+        Promedio de cada pan por día de la semana, redondeado a unidades, con el
+        formato de promedios_ventas.pkl: diccionario pan -> {día: promedio}.
+        """
+        conteo = self.conteo.sum(axis=1)
+        suma = self.suma.sum(axis=1)
+        con_datos = conteo > 0
+        medias = np.round(suma[con_datos] / conteo[con_datos, None])
+        dias = [dia for dia, hay in zip(self.dias, con_datos) if hay]
+        return {pan: {dia: float(media) for dia, media in zip(dias, medias[:, k])}
+                for k, pan in enumerate(self.panes)}
+
+    def guardar(self, ruta=RUTA_ESTADISTICAS):
+        """Guarda las estadísticas; primero en un temporal y luego se reemplaza el archivo."""
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        temporal = ruta + ".tmp.npz"
+        np.savez(temporal, dias=np.array(self.dias), climas=np.array(self.climas, dtype=str),
+                 panes=np.array(self.panes), conteo=self.conteo, suma=self.suma,
+                 suma_cuadrados=self.suma_cuadrados)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_ESTADISTICAS):
+        """Carga unas estadísticas guardadas con guardar()."""
+        with np.load(ruta) as datos:
+            promedios = cls(datos["dias"].tolist(), datos["climas"].tolist(), datos["panes"].tolist())
+            promedios.conteo = datos["conteo"]
+            promedios.suma = datos["suma"]
+            promedios.suma_cuadrados = datos["suma_cuadrados"]
+        return promedios
+
+
+def registrar_dia(dia, clima, cantidades, ruta=RUTA_ESTADISTICAS):
+    """
+    Suma las ventas de un día a las estadísticas guardadas. Si aún no existen,
+    primero se calculan con todo el historial (el día no debe estar ya en él):
+    unas estadísticas con un solo día reemplazarían los promedios de las ofertas.
+    """
+    if os.path.exists(ruta):
+        promedios = PromediosVentas.cargar(ruta)
+    else:
+        from almacen_ventas import cargar_historial
+        promedios = PromediosVentas.desde_ventas(cargar_historial()[0])
+    promedios.agregar(dia, clima, cantidades)
+    promedios.guardar(ruta)
+    return promedios
+
+
+if __name__ == "__main__":
+    import argparse
+    from datos_ventas import PANES, resumen_errores
+    from almacen_ventas import cargar_historial
+
+    parser = argparse.ArgumentParser(
+        description="Reconstruye las estadísticas de ventas desde el historial o suma las ventas de un día."
+    )
+    parser.add_argument("--dia", help="Día de la semana de las ventas a sumar (por ejemplo 'Lunes').")
+    parser.add_argument("--clima", help="Clima del día de las ventas a sumar.")
+    parser.add_argument("--cantidades", type=int, nargs=len(PANES), metavar="N",
+                        help=f"Unidades vendidas de cada pan, en este orden: {', '.join(PANES)}.")
+    parser.add_argument("--ruta", default=RUTA_ESTADISTICAS, help=f"Archivo de estadísticas (por defecto '{RUTA_ESTADISTICAS}').")
+    args = parser.parse_args()
+
+    if args.cantidades is not None:
+        if not args.dia or not args.clima:
+            parser.error("--cantidades requiere --dia y --clima")
+        try:
+            registrar_dia(args.dia, args.clima, args.cantidades, args.ruta)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Error: {e}")
+            raise SystemExit(1)
+        print(f"Ventas del {args.dia} ({args.clima}) sumadas a '{args.ruta}'.")
+    else:
+        ventas, errores = cargar_historial()
+        if errores:
+            print(resumen_errores(errores))
+        PromediosVentas.desde_ventas(ventas).guardar(args.ruta)
+        print(f"Estadísticas de {len(ventas)} días guardadas en '{args.ruta}'.")
@@ -0,0 +1,54 @@
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from registro_modelos import RegistroModelos
+from datos_ventas import DIAS, FORMATO_FECHA, numero_dia_semana
+
+
+def pronosticar(calendario, registro):
+    """
+    Recibe un DataFrame con las columnas Fecha y Clima y devuelve el plan de
+    producción: Fecha, Dia_De_La_Semana, Clima y una columna por pan.
+    """
+    fechas = pd.to_datetime(calendario["Fecha"], format=FORMATO_FECHA, errors="coerce")
+    # Una fecha vacía o mal escrita queda como NaT y no tiene día de la semana
+    invalidas = np.flatnonzero(fechas.isna().to_numpy())
+    if len(invalidas):
+        raise ValueError(f"Fechas vacías o no válidas en las filas {invalidas[:10].tolist()}"
+                         f"{' ...' if len(invalidas) > 10 else ''} (posición desde 0, formato AAAA-MM-DD).")
+    dias = np.array(DIAS)[numero_dia_semana(fechas)]
+    climas = calendario["Clima"].to_numpy()
+
+    # Cada columna se codifica con el índice de categorías y la matriz completa se predice por lotes
+    X = registro.indice.codificar_columnas(dias, climas)
+    predicciones = registro.predecir_lote(X)
+
+    plan = pd.DataFrame({"Fecha": fechas.dt.strftime("%Y-%m-%d"), "Dia_De_La_Semana": dias, "Clima": climas})
+    for pan in registro.PANES:
+        # Igual que en la app: se muestran unidades enteras
+        plan[pan] = np.asarray(predicciones[pan]).astype(int)
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Genera un plan de producción a partir de un calendario CSV con columnas Fecha y Clima."
+    )
+    parser.add_argument("calendario", help="CSV con las columnas Fecha (AAAA-MM-DD) y Clima.")
+    parser.add_argument("--salida", default="plan_produccion.csv",
+                        help="CSV donde se escribe el plan (por defecto 'plan_produccion.csv').")
+    parser.add_argument("--carpeta-modelos", default="models",
+                        help="Carpeta con los modelos y encoders (por defecto 'models').")
+    args = parser.parse_args()
+
+    try:
+        calendario = pd.read_csv(args.calendario, usecols=["Fecha", "Clima"])
+        registro = RegistroModelos(carpeta=args.carpeta_modelos)
+        plan = pronosticar(calendario, registro)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    plan.to_csv(args.salida, index=False)
+    print(f"Plan de producción para {len(plan)} días guardado en '{args.salida}'.")
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+import joblib
+import numpy as np
+from tabla_predicciones import cargar_tabla
+from predictor_panes import cargar_predictor
+from indice_categorias import cargar_indice
+from paquete_modelos import cargar_paquete
+from versiones_modelos import version_actual, carpeta_version
+from medicion_tiempos import medir
+from promedios_ventas import PromediosVentas, RUTA_ESTADISTICAS
+from datos_ventas import PANES
+
+ORDEN_DIAS = ["Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
+
+
+class RegistroModelos:
+    """
+    Encoders, tabla de predicciones, modelos y promedios cargados una sola vez.
+    Lo comparten la pantalla de predicción y la de ofertas. Si existe el paquete
+    de modelos (ver paquete_modelos) todo sale de ese único archivo.
+    """
+
+    def __init__(self, carpeta="models", panes=PANES):
+        # Versión publicada vigente (ver versiones_modelos); sin versiones se usa 'carpeta' tal cual
+        self.version = version_actual(carpeta)
+        # Las estadísticas de ventas no dependen de la versión: se actualizan cada día en la carpeta base
+        self.ruta_estadisticas = os.path.join(carpeta, os.path.basename(RUTA_ESTADISTICAS))
+        # Una versión publicada solo contiene el paquete: si al paquete le faltan los
+        # modelos o los promedios, se usan los archivos sueltos de la carpeta base
+        self.carpeta_base = carpeta
+        carpeta = carpeta_version(carpeta, self.version)
+        self.carpeta = carpeta
+        self.PANES = list(panes)
+
+        with medir("carga.paquete"):
+            self.paquete = cargar_paquete(carpeta)
+
+        # Códigos de día y clima en diccionarios (sin LabelEncoder ni sklearn)
+        with medir("carga.encoders"):
+            self.indice = self.paquete.indice() if self.paquete else cargar_indice(carpeta)
+            self.DIAS_SEMANA = [dia for dia in ORDEN_DIAS if dia in self.indice.codigo_dia]
+            self.CLIMAS = list(self.indice.climas)
+
+        # Si existe la tabla precalculada no hace falta cargar los modelos
+        with medir("carga.tabla"):
+            if self.paquete:
+                self.tabla = self.paquete.tabla()
+            else:
+                self.tabla = cargar_tabla(os.path.join(carpeta, "tabla_predicciones.npy"),
+                                          os.path.join(carpeta, "tabla_predicciones_indice.pkl"))
+        self.predictor = None
+        if self.tabla is None or not self.tabla.contiene(self.PANES):
+            self.tabla = None
+            # Modelo de salida múltiple o un modelo por pan, según lo que se haya entrenado
+            with medir("carga.modelos"):
+                if self.paquete:
+                    self.predictor = self.paquete.predictor(self.PANES)
+                if self.predictor is None:
+                    self.predictor = cargar_predictor(self.PANES, self.carpeta_base)
+
+        self._promedios_ventas = None
+        self._marca_estadisticas = None
+        self._candado = threading.Lock()
+
+    def obtener_promedios(self):
+        """
+        Promedios históricos de ventas (solo los usa la pantalla de ofertas).
+        Se toman de las estadísticas de ventas (ver promedios_ventas), que se
+        vuelven a leer cuando cambian; si no existen, del paquete o del .pkl.
+        """
+        try:
+            marca = os.stat(self.ruta_estadisticas).st_mtime_ns
+        except FileNotFoundError:
+            marca = None
+        with self._candado:
+            if marca is not None and marca != self._marca_estadisticas:
+                with medir("carga.promedios"):
+                    self._promedios_ventas = PromediosVentas.cargar(self.ruta_estadisticas).promedios_por_dia()
+                self._marca_estadisticas = marca
+            elif self._promedios_ventas is None:
+                with medir("carga.promedios"):
+                    if self.paquete:
+                        self._promedios_ventas = self.paquete.promedios()
+                    if self._promedios_ventas is None:
+                        self._promedios_ventas = joblib.load(os.path.join(self.carpeta_base, "promedios_ventas.pkl"))
+            return self._promedios_ventas
+
+    def estadisticas_modelos(self):
+        """Estadísticas de la caché de modelos por pan (None si se usa la tabla o el modelo único)."""
+        if self.predictor is None:
+            return None
+        return getattr(self.predictor, "estadisticas", lambda: None)()
+
+    def predecir(self, dia, clima, pan):
+        """Predicción en unidades para un día, clima y pan."""
+        if self.tabla is not None:
+            with medir("prediccion.tabla"):
+                return self.tabla.predecir(dia, clima, pan)
+        with medir("prediccion.codificacion"):
+            X = self.indice.codificar(dia, clima)
+        return float(self.predictor.predecir(X, [pan])[pan][0])
+
+    def predecir_lote(self, X):
+        """
+        Predicciones para una matriz (n, 2) de códigos Dia_enc y Clima_enc.
+        Devuelve un diccionario pan -> arreglo de n predicciones en unidades.
+        """
+        X = np.asarray(X)
+        if self.tabla is not None:
+            return self.tabla.predecir_codigos(X[:, 0], X[:, 1])
+        return self.predictor.predecir(X, self.PANES)
+
+    def predecir_todos(self, dia, clima):
+        """Diccionario pan -> predicción en unidades para un día y clima."""
+        if self.tabla is not None:
+            with medir("prediccion.tabla"):
+                return self.tabla.predecir_todos(dia, clima)
+        with medir("prediccion.codificacion"):
+            X = self.indice.codificar(dia, clima)
+        predicciones = self.predictor.predecir(X, self.PANES)
+        return {pan: float(valores[0]) for pan, valores in predicciones.items()}
+
+
+_registro = None
+_candado_registro = threading.Lock()
+
+
+def obtener_registro():
+    """Devuelve el registro del proceso, cargándolo la primera vez que se pide."""
+    global _registro
+    if _registro is None:
+        with _candado_registro:
+            if _registro is None:
+                _registro = RegistroModelos()
+    return _registro
+
+
+def registro_cargado():
+    """Registro del proceso si ya se cargó, o None (nunca lo carga)."""
+    return _registro
+
+
+def recargar_si_cambio(carpeta="models"):
+    """
+    Si el puntero de versión cambió, carga la versión nueva en el hilo que llama
+    y solo después la pone en lugar del registro del proceso; mientras tanto se
+    sigue usando el anterior. Devuelve la versión cargada, o None si no cambió.
+    """
+    global _registro
+    version = version_actual(carpeta)
+    if _registro is None or _registro.version == version:
+        return None
+
+    nuevo = RegistroModelos(carpeta)
+    nuevo.predecir(nuevo.DIAS_SEMANA[0], nuevo.CLIMAS[0], nuevo.PANES[0])
+    try:
+        nuevo.obtener_promedios()
+    except FileNotFoundError:
+        pass # La pantalla de ofertas avisará si faltan los promedios
+    with _candado_registro:
+        _registro = nuevo
+    return nuevo.version
+
+
+def vigilar_versiones(al_recargar=None, al_fallar=None, intervalo=2.0, carpeta="models"):
+    """
+    Revisa el puntero de versión cada 'intervalo' segundos en un hilo en segundo
+    plano y recarga el registro cuando cambia. 'al_recargar(version)' y
+    'al_fallar(version, error)' se llaman desde ese hilo.
+    """
+    def vigilar():
+        fallida = None
+        while True:
+            time.sleep(intervalo)
+            version = version_actual(carpeta)
+            if version == fallida:
+                continue # No se reintenta una versión que ya falló
+            try:
+                cargada = recargar_si_cambio(carpeta)
+            except Exception as e:
+                fallida = version
+                if al_fallar:
+                    al_fallar(version, e)
+                continue
+            if cargada and al_recargar:
+                al_recargar(cargada)
+
+    hilo = threading.Thread(target=vigilar, daemon=True)
+    hilo.start()
+    return hilo
+
+
+def precalentar():
+    """
+    Carga el registro y hace una predicción de prueba, de modo que el primer
+    clic del usuario no pague el costo de inicialización. Solo se predice el
+    primer pan: el resto de modelos se carga cuando se usa.
+    """
+    registro = obtener_registro()
+    registro.predecir(registro.DIAS_SEMANA[0], registro.CLIMAS[0], registro.PANES[0])
+    return registro
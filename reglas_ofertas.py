@@ -0,0 +1,22 @@
+# UMBRAL: Si la venta predicha es menor al 85% del promedio, se recomienda una oferta.
+UMBRAL_OFERTA = 0.85
+
+
+def detectar_ofertas(predicciones, promedios_ventas, dia, panes, umbral=UMBRAL_OFERTA):
+    """
+    Compara la predicción de cada pan con su promedio histórico para ese día.
+    Devuelve una lista de diccionarios {pan, prediccion, promedio} con los panes
+    para los que se sugiere una oferta.
+    """
+    ofertas = []
+    for pan in panes:
+        # 1. Demanda predicha (en unidades enteras, como se muestra en la app)
+        prediccion = int(predicciones[pan])
+
+        # 2. Obtener el promedio histórico
+        promedio = int(promedios_ventas.get(pan, {}).get(dia, 0))
+
+        # 3. Comparar y decidir si se recomienda oferta
+        if promedio > 0 and prediccion < promedio * umbral:
+            ofertas.append({"pan": pan, "prediccion": prediccion, "promedio": promedio})
+    return ofertas
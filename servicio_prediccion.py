@@ -0,0 +1,180 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from registro_modelos import RegistroModelos
+from reglas_ofertas import detectar_ofertas
+
+# El servicio solo escucha en la máquina local
+HOST = "127.0.0.1"
+PUERTO = 8765
+
+
+class AgrupadorPeticiones:
+    """
+    Junta las peticiones que llegan dentro de una ventana corta y las resuelve con
+    una sola llamada por lotes al registro (una llamada por pan, o una sola con el
+    modelo de salida múltiple), en lugar de una llamada por petición.
+    """
+
+    def __init__(self, registro, ventana=0.005, max_lote=256):
+        self.registro = registro
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.peticiones = 0
+        self._cola = queue.Queue()
+        self._detenido = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def predecir(self, dia_enc, clima_enc, timeout=5.0):
+        """Encola una petición y espera su resultado (diccionario pan -> unidades)."""
+        futuro = Future()
+        self._cola.put((dia_enc, clima_enc, futuro))
+        return futuro.result(timeout=timeout)
+
+    def detener(self):
+        self._detenido.set()
+        self._hilo.join()
+
+    def _bucle(self):
+        while not self._detenido.is_set():
+            try:
+                primera = self._cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # Se esperan más peticiones hasta que se cierre la ventana o se llene el lote
+            lote = [primera]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        X = np.array([[dia_enc, clima_enc] for dia_enc, clima_enc, _ in lote])
+        try:
+            predicciones = self.registro.predecir_lote(X)
+        except Exception as e:
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        self.lotes += 1
+        self.peticiones += len(lote)
+        for i, (_, _, futuro) in enumerate(lote):
+            futuro.set_result({pan: float(valores[i]) for pan, valores in predicciones.items()})
+
+
+class ServicioPrediccion(ThreadingHTTPServer):
+    """Servidor HTTP local que comparte un único registro de modelos entre todos los clientes."""
+
+    daemon_threads = True
+
+    def __init__(self, registro, puerto=PUERTO, ventana=0.005):
+        super().__init__((HOST, puerto), ManejadorPeticiones)
+        self.registro = registro
+        self.agrupador = AgrupadorPeticiones(registro, ventana=ventana)
+        registro.obtener_promedios() # Falla al arrancar si no hay promedios
+
+    def server_close(self):
+        self.agrupador.detener()
+        super().server_close()
+
+
+class ManejadorPeticiones(BaseHTTPRequestHandler):
+    """
+    Rutas:
+      GET /salud
+      GET /pronostico?dia=Lunes&clima=nublado[&pan=Pan_Dulce_Cantidad]
+      GET /ofertas?dia=Lunes&clima=nublado
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametros = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+        try:
+            if url.path == "/salud":
+                self._responder(200, {"estado": "ok", "lotes": self.server.agrupador.lotes,
+                                      "peticiones": self.server.agrupador.peticiones})
+            elif url.path == "/pronostico":
+                self._responder(200, self._pronostico(parametros))
+            elif url.path == "/ofertas":
+                self._responder(200, self._ofertas(parametros))
+            else:
+                self._responder(404, {"error": f"Ruta desconocida: {url.path}"})
+        except ValueError as e:
+            self._responder(400, {"error": str(e)})
+        except Exception as e:
+            self._responder(500, {"error": f"Error al calcular la predicción: {e}"})
+
+    def _predecir(self, parametros):
+        dia = parametros.get("dia")
+        clima = parametros.get("clima")
+        indice = self.server.registro.indice
+        if dia not in indice.codigo_dia:
+            raise ValueError(f"Día no válido: {dia}. Valores válidos: {indice.dias}")
+        if clima not in indice.codigo_clima:
+            raise ValueError(f"Clima no válido: {clima}. Valores válidos: {indice.climas}")
+        predicciones = self.server.agrupador.predecir(indice.codigo_dia[dia], indice.codigo_clima[clima])
+        return dia, clima, predicciones
+
+    def _pronostico(self, parametros):
+        dia, clima, predicciones = self._predecir(parametros)
+        pan = parametros.get("pan")
+        if pan is not None:
+            if pan not in predicciones:
+                raise ValueError(f"Tipo de pan no válido: {pan}")
+            predicciones = {pan: predicciones[pan]}
+        return {"dia": dia, "clima": clima, "predicciones": predicciones}
+
+    def _ofertas(self, parametros):
+        dia, clima, predicciones = self._predecir(parametros)
+        # Se piden en cada consulta: las estadísticas de ventas pueden haberse actualizado
+        ofertas = detectar_ofertas(predicciones, self.server.registro.obtener_promedios(), dia,
+                                   self.server.registro.PANES)
+        return {"dia": dia, "clima": clima, "ofertas": ofertas}
+
+    def _responder(self, codigo, contenido):
+        cuerpo = json.dumps(contenido, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        # Sin registro por petición: el servicio debe soportar pruebas de carga
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio local (127.0.0.1) de predicción de demanda y ofertas.")
+    parser.add_argument("--puerto", type=int, default=PUERTO, help=f"Puerto de escucha (por defecto {PUERTO}).")
+    parser.add_argument("--ventana-ms", type=float, default=5.0,
+                        help="Ventana en milisegundos para agrupar peticiones concurrentes (por defecto 5).")
+    parser.add_argument("--carpeta-modelos", default="models",
+                        help="Carpeta con los modelos y encoders (por defecto 'models').")
+    args = parser.parse_args()
+
+    servicio = ServicioPrediccion(RegistroModelos(carpeta=args.carpeta_modelos), puerto=args.puerto,
+                                  ventana=args.ventana_ms / 1000)
+    print(f"Servicio de predicción escuchando en http://{HOST}:{args.puerto}")
+    try:
+        servicio.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.server_close()
@@ -0,0 +1,87 @@
+import os
+import joblib
+import numpy as np
+
+# Archivos de la tabla precalculada de predicciones
+RUTA_TABLA = "models/tabla_predicciones.npy"
+RUTA_INDICE = "models/tabla_predicciones_indice.pkl"
+
+
+def construir_tabla(predictor, dias, climas, panes):
+    """
+    Evalúa cada combinación (día, clima, pan) una sola vez con el predictor
+    (ver predictor_panes) y devuelve un arreglo de forma
+    (len(dias), len(climas), len(panes)) con las unidades predichas.
+
+    'dias' y 'climas' deben estar en el mismo orden que los 'classes_' de los
+    LabelEncoder, de modo que la posición de cada valor sea su código.
+    """
+    dia_enc, clima_enc = np.meshgrid(np.arange(len(dias)), np.arange(len(climas)), indexing="ij")
+    X = np.column_stack([dia_enc.ravel(), clima_enc.ravel()])
+
+    predicciones = predictor.predecir(X, panes)
+    tabla = np.empty((len(dias), len(climas), len(panes)), dtype=np.float32)
+    for k, pan in enumerate(panes):
+        tabla[:, :, k] = predicciones[pan].reshape(len(dias), len(climas))
+    return tabla
+
+
+def guardar_tabla(tabla, dias, climas, panes, ruta_tabla=RUTA_TABLA, ruta_indice=RUTA_INDICE):
+    """Guarda la tabla de predicciones y su índice en la carpeta 'models'."""
+    os.makedirs(os.path.dirname(ruta_tabla), exist_ok=True)
+    np.save(ruta_tabla, tabla)
+    joblib.dump({"dias": list(dias), "climas": list(climas), "panes": list(panes)}, ruta_indice)
+
+
+class TablaPredicciones:
+    """Consulta en tiempo constante de la tabla precalculada de predicciones."""
+
+    def __init__(self, tabla, indice):
+        self.tabla = tabla
+        self.dias = indice["dias"]
+        self.climas = indice["climas"]
+        self.panes = indice["panes"]
+        # Diccionarios valor -> posición para evitar búsquedas en listas
+        self._pos_dia = {dia: i for i, dia in enumerate(self.dias)}
+        self._pos_clima = {clima: i for i, clima in enumerate(self.climas)}
+        self._pos_pan = {pan: i for i, pan in enumerate(self.panes)}
+
+    def predecir(self, dia, clima, pan):
+        """Devuelve la predicción (en unidades) para un día, clima y pan."""
+        return float(self.tabla[self._pos_dia[dia], self._pos_clima[clima], self._pos_pan[pan]])
+
+    def predecir_todos(self, dia, clima):
+        """Devuelve un diccionario pan -> predicción para un día y clima."""
+        fila = self.tabla[self._pos_dia[dia], self._pos_clima[clima]]
+        return {pan: float(fila[k]) for k, pan in enumerate(self.panes)}
+
+    def predecir_codigos(self, dia_enc, clima_enc):
+        """
+        Consulta vectorizada: recibe arreglos de códigos de día y clima (los de los
+        LabelEncoder) y devuelve un diccionario pan -> arreglo de predicciones.
+        """
+        filas = self.tabla[np.asarray(dia_enc), np.asarray(clima_enc)]
+        return {pan: filas[:, k] for k, pan in enumerate(self.panes)}
+
+    def contiene(self, panes):
+        """Indica si la tabla cubre todos los panes indicados."""
+        return all(pan in self._pos_pan for pan in panes)
+
+
+def cargar_tabla(ruta_tabla=RUTA_TABLA, ruta_indice=RUTA_INDICE):
+    """Carga la tabla precalculada. Devuelve None si todavía no se ha generado."""
+    if not (os.path.exists(ruta_tabla) and os.path.exists(ruta_indice)):
+        return None
+    return TablaPredicciones(np.load(ruta_tabla), joblib.load(ruta_indice))
+
+
+if __name__ == "__main__":
+    # Genera la tabla a partir de los modelos ya entrenados, sin reentrenar
+    from predictor_panes import cargar_predictor
+    from datos_ventas import PANES
+
+    dias = joblib.load("models/dias_semana.pkl")
+    climas = joblib.load("models/climas.pkl")
+    tabla = construir_tabla(cargar_predictor(PANES), dias, climas, PANES)
+    guardar_tabla(tabla, dias, climas, PANES)
+    print(f"Tabla de predicciones guardada en '{RUTA_TABLA}' ({tabla.shape[0]} días x {tabla.shape[1]} climas x {tabla.shape[2]} panes).")
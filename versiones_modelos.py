@@ -0,0 +1,65 @@
+import os
+import shutil
+from datetime import datetime
+from paquete_modelos import RUTA_PAQUETE, PaqueteModelos
+
+# Cada entrenamiento se publica en models/versiones/<versión>/ y el archivo
+# models/actual indica cuál es la vigente. Las apps solo leen versiones completas.
+CARPETA_VERSIONES = "versiones"
+PUNTERO = "actual"
+
+# Versiones antiguas que se conservan (además de la vigente)
+VERSIONES_CONSERVADAS = 5
+
+
+def version_actual(carpeta="models"):
+    """Nombre de la versión vigente, o None si todavía no se publicó ninguna."""
+    try:
+        with open(os.path.join(carpeta, PUNTERO), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def carpeta_version(carpeta="models", version=None):
+    """Carpeta con los artefactos de una versión (sin versión, la propia 'carpeta')."""
+    if version is None:
+        return carpeta
+    return os.path.join(carpeta, CARPETA_VERSIONES, version)
+
+
+def publicar_version(ruta_paquete, carpeta="models", conservar=VERSIONES_CONSERVADAS):
+    """
+    Copia el paquete de modelos a una carpeta de versión nueva y después cambia
+    el puntero 'actual' con os.replace, que es atómico: quien lo lea verá la
+    versión anterior o la nueva, nunca una a medio escribir. El SHA-256 de la
+    copia se comprueba aquí, una sola vez, para que las apps puedan abrir el
+    paquete sin leerlo entero; si no coincide, la versión no se publica.
+    """
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    destino = carpeta_version(carpeta, version)
+    os.makedirs(destino)
+    ruta_destino = os.path.join(destino, os.path.basename(RUTA_PAQUETE))
+    shutil.copyfile(ruta_paquete, ruta_destino + ".tmp")
+    try:
+        PaqueteModelos(ruta_destino + ".tmp", verificar=True)
+    except ValueError:
+        shutil.rmtree(destino, ignore_errors=True)
+        raise
+    os.replace(ruta_destino + ".tmp", ruta_destino)
+
+    puntero = os.path.join(carpeta, PUNTERO)
+    with open(puntero + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(puntero + ".tmp", puntero)
+
+    _limpiar_versiones(carpeta, version, conservar)
+    return version
+
+
+def _limpiar_versiones(carpeta, vigente, conservar):
+    """Borra las versiones más antiguas. Si alguna sigue abierta (Windows) se deja para otra vez."""
+    raiz = os.path.join(carpeta, CARPETA_VERSIONES)
+    antiguas = sorted(version for version in os.listdir(raiz) if version != vigente)
+    for version in antiguas[:max(0, len(antiguas) - conservar)]:
+        shutil.rmtree(os.path.join(raiz, version), ignore_errors=True)